@@ -2,21 +2,53 @@ import pandas as pd
 from jinja2 import Environment, FileSystemLoader
 import pdfkit
 
+from columns_cache import ColumnsCache
+from name_index import NameIndex, ProfessionMatcher
+from vacancies_db import VacanciesDB
+from vacancy_cube import VacancyCube
+
 class Report:
     ''' Создает отчет в виде pdf-файла.
 
     Attributes:
-        file_name (DataFrame) : файл с данными о вакансиях
+        file_name (DataFrame) : файл с данными о вакансиях (None, если данные в базе SQLite)
+        db (VacanciesDB) : база SQLite с вакансиями, если вместо CSV-файла указан файл .db,
+            или куб VacancyCube, если указан файл .npz из vacancy_cube.py
+        source_file_name (str) : название файла с данными о вакансиях
         profession (str) : название профессии
+        use_cache (bool) : сохранять снимок колонок и индекс названий рядом с файлом для повторных запусков
     '''
-    def __init__(self, file_name, profession):
+    def __init__(self, file_name, profession, use_cache=False):
         '''Инициализирует класс Report
 
-        :param file_name(DataFrame) : файл с данными о вакансиях
+        :param file_name(DataFrame) : файл с данными о вакансиях (CSV, база SQLite из vacancies_db.py или куб из vacancy_cube.py)
         profession (str) : название профессии
+        :param use_cache: читать CSV через бинарный снимок ColumnsCache и сохранять индекс названий рядом с файлом
         '''
-        self.file_name = pd.read_csv(file_name)
+        self.source_file_name = file_name
+        self.db = VacanciesDB(file_name) if file_name.endswith('.db') else (
+            VacancyCube.load(file_name) if file_name.endswith('.npz') else None)
+        self.file_name = None if self.db else (ColumnsCache(file_name).read_csv() if use_cache else pd.read_csv(file_name))
         self.profession = profession
+        self.use_cache = use_cache
+
+    def get_profession_mask(self):
+        '''Отмечает вакансии выбранной профессии (как str.contains(profession, case=False)) по индексу названий,
+        который при use_cache сохраняется рядом с файлом и используется повторно для других профессий.
+        :return: булев массив длины file_name.shape[0]
+        '''
+        names = self.file_name['name'].tolist()
+        index = NameIndex.load_or_build(self.source_file_name, names) if self.use_cache else NameIndex.build(names)
+        return index.get_mask(self.profession, case=False)
+
+    def get_profession_masks(self, professions):
+        '''Отмечает вакансии нескольких профессий за один проход по названиям (автомат Ахо — Корасик).
+        :param professions: список профессий
+        :return: словарь, где ключ - профессия, значение - булев массив длины file_name.shape[0]
+        '''
+        if professions == [self.profession]:
+            return {self.profession: self.get_profession_mask()}
+        return ProfessionMatcher(professions, case=False).get_masks(self.file_name['name'].tolist())
 
     def get_data(self):
         '''Создает словари с информацией по годам.
@@ -25,33 +57,72 @@ class Report:
         :return: salary_profession: словарь с зарплатой выбранной профессии по годам
         :return: count_profession: словарь с количеством выбранной профессии по годам
         '''
-        self.file_name['year'] = self.file_name['published_at'].apply(lambda x: x[:4])
-        years = self.file_name.groupby(['year'])
-        salary_vacansies = {}
-        count_vacansies = {}
-        salary_profession = {}
-        count_profession = {}
-        for year, data in years:
-            salary_vacansies[year] = round(data.apply(lambda x: x['salary'], axis=1).mean())
-            count_vacansies[year] = data.shape[0]
-            salary_profession[year] = round(data[data['name'].str.contains(self.profession, case=False)].apply(lambda x: x['salary'], axis=1).mean())
-            count_profession[year] = data[data['name'].str.contains(self.profession, case=False)].shape[0]
-        return salary_vacansies, count_vacansies, salary_profession, count_profession
+        return self.get_batch_data([self.profession])[self.profession]
+
+    def get_batch_data(self, professions):
+        '''Создает словари с информацией по годам сразу для нескольких профессий за один проход по данным:
+        статистика по всем вакансиям считается один раз.
+        :param professions: список профессий
+        :return: словарь, где ключ - профессия, значение - salary_vacansies, count_vacansies, salary_profession, count_profession
+        '''
+        if self.db:
+            return {profession: self.db.get_year_statistics(profession) for profession in professions}
+        years = self.file_name['published_at'].str[:4]
+        salary = self.file_name['salary']
+        totals = salary.groupby(years).agg(['mean', 'size'])
+        salary_vacansies = Report.round_means(totals['mean'])
+        count_vacansies = {year: int(count) for year, count in totals['size'].items()}
+        result = {}
+        for profession, profession_mask in self.get_profession_masks(professions).items():
+            profession_totals = salary[profession_mask].groupby(years[profession_mask]).agg(['mean', 'size'])
+            profession_totals = profession_totals.reindex(totals.index).fillna({'size': 0})
+            result[profession] = (salary_vacansies, count_vacansies, Report.round_means(profession_totals['mean']),
+                                  {year: int(count) for year, count in profession_totals['size'].items()})
+        return result
+
+    @staticmethod
+    def round_means(means):
+        '''Округляет средние зарплаты по годам
+        :param means: Series, где индекс - год, значение - средняя зарплата (NaN, если зарплат нет)
+        :return: словарь, где ключ - год, значение - округленная средняя зарплата (0, если зарплат нет)
+        '''
+        return {year: 0 if pd.isna(mean) else round(mean) for year, mean in means.items()}
 
     def make_pdf(self):
         '''Создает отчет в виде pdf-файла
         :return: отчет в виде pdf-файла с аналитикой с 2003г по 2022г.
         '''
-        salary_vacansies, count_vacansies, salary_profession, count_profession = self.get_data()
+        Report.render_pdf(self.profession, self.get_data(), 'report(3.4.2).pdf')
+
+    def make_pdfs(self, professions):
+        '''Создает отчеты по нескольким профессиям, данные читаются и обрабатываются один раз
+        :param professions: список профессий
+        :return: pdf-файлы report(3.4.2) <профессия>.pdf
+        '''
+        for profession, data in self.get_batch_data(professions).items():
+            Report.render_pdf(profession, data, f'report(3.4.2) {profession}.pdf')
+
+    @staticmethod
+    def render_pdf(profession, data, output_file_name):
+        '''Формирует pdf-файл по словарям с информацией по годам
+        :param profession: название профессии
+        :param data: salary_vacansies, count_vacansies, salary_profession, count_profession
+        :param output_file_name: название pdf-файла
+        '''
+        salary_vacansies, count_vacansies, salary_profession, count_profession = data
         template = Environment(loader=FileSystemLoader('.')).get_template('pdf_template(3.4.2).html')
         data = [[year, salary_vacansies[year], salary_profession[year], count_vacansies[year], count_profession[year]] for year in salary_vacansies]
-        pdf_template = template.render({'profession': self.profession, 'data': data})
+        pdf_template = template.render({'profession': profession, 'data': data})
         config = pdfkit.configuration(wkhtmltopdf=r'C:\Users\kh_ju\homework python\wkhtmltopdf\bin\wkhtmltopdf.exe')
-        pdfkit.from_string(pdf_template, 'report(3.4.2).pdf', configuration=config, options={"enable-local-file-access": ""})
+        pdfkit.from_string(pdf_template, output_file_name, configuration=config, options={"enable-local-file-access": ""})
 
 # file_name = 'full_converted_vacancies_dif_currencies(3.4.1).csv'
 # profession = "Аналитик"
-file_name = input('Введите название файла: ')
-profession = input('Введите название профессии: ').lower()
-report = Report(file_name, profession)
-report.make_pdf()
+if __name__ == '__main__':
+    file_name = input('Введите название файла: ')
+    professions = [profession.strip() for profession in input("Введите название профессии (несколько - через ';'): ").lower().split(';')]
+    report = Report(file_name, professions[0], use_cache=True)
+    if len(professions) == 1:
+        report.make_pdf()
+    else:
+        report.make_pdfs(professions)
@@ -2,73 +2,165 @@ import pandas as pd
 from jinja2 import Environment, FileSystemLoader
 import pdfkit
 
+from columns_cache import ColumnsCache
+from name_index import ProfessionMatcher
+from vacancies_db import VacanciesDB
+from vacancy_cube import VacancyCube
+
 
 class Report:
     '''Создает отчет в виде pdf-файла.
 
     Attributes:
-        file_name (DataFrame) : файл с данными о вакансиях
+        file_name (DataFrame) : файл с данными о вакансиях (None, если данные в базе SQLite)
+        db (VacanciesDB) : база SQLite с вакансиями, если вместо CSV-файла указан файл .db,
+            или куб VacancyCube, если указан файл .npz из vacancy_cube.py
         profession (str) : название профессии
         area_name(str): название города
+        cube (DataFrame) : предварительно посчитанные суммы и количества по профессиям, городам и годам
+            (None, пока не вызван build_cube)
+        cube_professions (list) : профессии, по которым построен куб
     '''
 
-    def __init__(self, file_name, profession, area_name):
+    def __init__(self, file_name, profession, area_name, use_cache=False):
         '''
         Инициализирует класс Report
 
         :param file_name(DataFrame) : файл с данными о вакансиях
         :param: profession (str) : название профессии
         :param area_name (str): название города
+        :param use_cache: читать CSV через бинарный снимок ColumnsCache, который сохраняется рядом с файлом
         '''
-        self.file_name = pd.read_csv(file_name)
+        self.db = VacanciesDB(file_name) if file_name.endswith('.db') else (
+            VacancyCube.load(file_name) if file_name.endswith('.npz') else None)
+        self.file_name = None if self.db else (ColumnsCache(file_name).read_csv() if use_cache else pd.read_csv(file_name))
         self.profession = profession
         self.area_name = area_name
+        self.cube = None
+        self.cube_professions = []
 
     def get_data_area(self):
         '''Создает словари с информацией по всем городам.
         :return salary_profession: словарь с аналитикой по зарплате выбранной профессии
         :return count_profession: словарь с аналитикой по количеству вакансий выбранной профессии
         '''
-        data = self.file_name[
-            (self.file_name['name'].str.contains(self.profession, case=False)) & (self.file_name['area_name'] == self.area_name)]
-        data['year'] = data['published_at'].apply(lambda x: x[:4])
-        salary_profession = {}
-        count_profession = {}
-        for year, data in data.groupby(['year']):
-            salary_profession[year] = round(data['salary'].mean())
-            count_profession[year] = data.shape[0]
-        return salary_profession, count_profession
+        return self.get_batch_data_area([(self.profession, self.area_name)])[(self.profession, self.area_name)]
+
+    def get_batch_data_area(self, queries):
+        '''Создает словари с информацией по годам для нескольких пар (профессия, город): названия вакансий
+        сравниваются со всеми профессиями за один проход (как str.contains(profession, case=False)).
+        :param queries: список пар (профессия, город)
+        :return: словарь, где ключ - пара (профессия, город), значение - salary_profession, count_profession
+        '''
+        if self.db:
+            return {(profession, area_name): self.db.get_area_statistics(profession, area_name)
+                    for profession, area_name in queries}
+        professions = list(dict.fromkeys(profession for profession, area_name in queries))
+        if not set(professions) <= set(self.cube_professions):
+            self.build_cube(list(dict.fromkeys(self.cube_professions + professions)))
+        return {(profession, area_name): Report.slice_cube(self.cube, profession, area_name)
+                for profession, area_name in queries}
+
+    def build_cube(self, professions):
+        '''Считает один раз суммы зарплат, количества зарплат и количества вакансий по профессиям, городам и годам,
+        после чего отчет по любой паре (профессия, город) из этих профессий - выборка из куба.
+        Названия вакансий сравниваются со всеми профессиями за один проход (как str.contains(profession, case=False)).
+        :param professions: список профессий
+        :return: DataFrame с индексом (profession, area_name, year) и колонками salary_sum, salary_count, count
+        '''
+        profession_masks = ProfessionMatcher(professions, case=False).get_masks(self.file_name['name'].tolist())
+        years = self.file_name['published_at'].str[:4]
+        cube = {}
+        for profession, profession_mask in profession_masks.items():
+            data = self.file_name[profession_mask]
+            cube[profession] = data['salary'].groupby([data['area_name'], years[profession_mask]]).agg(
+                salary_sum='sum', salary_count='count', count='size')
+        self.cube = pd.concat(cube, names=['profession', 'area_name', 'year']).sort_index()
+        self.cube_professions = list(professions)
+        return self.cube
+
+    @staticmethod
+    def slice_cube(cube, profession, area_name):
+        '''Считает среднюю зарплату и количество вакансий по годам для пары (профессия, город) из куба.
+        :param cube: результат build_cube
+        :param profession: название профессии
+        :param area_name: название города
+        :return salary_profession: словарь с аналитикой по зарплате
+        :return count_profession: словарь с аналитикой по количеству вакансий
+        '''
+        try:
+            data = cube.loc[(profession, area_name)]
+        except KeyError:
+            return {}, {}
+        return (Report.round_means(data['salary_sum'] / data['salary_count']),
+                {year: int(count) for year, count in data['count'].items()})
+
+    @staticmethod
+    def round_means(means):
+        '''Округляет средние зарплаты
+        :param means: Series средних зарплат (NaN, если зарплат нет)
+        :return: словарь, где ключ - индекс Series, значение - округленная средняя зарплата (0, если зарплат нет)
+        '''
+        return {key: 0 if pd.isna(mean) else round(mean) for key, mean in means.items()}
 
     def get_data_areas(self):
-        '''Создает словари с информацией по всем городам.
+        '''Создает словари с информацией по всем городам одной группировкой по городам:
+        количество вакансий и средняя зарплата считаются вместе, города с равным количеством идут в порядке
+        первого появления, города без зарплат не попадают в рейтинг по зарплате.
         :return salary_area_dict: словарь с аналитикой по зарплатам по топ 10 городам
         :return top_area_proportion: словарь с аналитикой по количествам вакансий по топ 10 городам
         '''
-        area_proportion = dict(filter(lambda x: x[-1] > 0.01, [(k, round(v / self.file_name.shape[0], 4))
-                                                               for k, v in self.file_name['area_name'].value_counts().to_dict().items()]))
-        top_area_proportion = dict(list(area_proportion.items())[:10])
-        vacancies_area = self.file_name.groupby(['area_name'])
-        salary_by_area = {area: round(data['salary'].mean()) for area, data in vacancies_area if area in area_proportion}
-        salary_area_dict = dict(sorted(salary_by_area.items(), key=lambda x: x[-1], reverse=True)[:10])
+        if self.db:
+            return self.db.get_areas_statistics()
+        areas = self.file_name.groupby('area_name', sort=False)['salary'].agg(['size', 'mean'])
+        areas['proportion'] = [round(count / self.file_name.shape[0], 4) for count in areas['size'].tolist()]
+        areas = areas[areas['proportion'] > 0.01].sort_values('size', ascending=False, kind='stable')
+        top_area_proportion = areas['proportion'][:10].to_dict()
+        salary_area_dict = dict(sorted(Report.round_means(areas['mean'].dropna().sort_index()).items(),
+                                       key=lambda x: x[-1], reverse=True)[:10])
         return salary_area_dict, top_area_proportion
 
-
     def make_pdf(self):
         '''Создает отчет в виде pdf-файла
         :return: отчет в виде pdf-файла с аналитикой с 2003г по 2022г.
         '''
-        salary_profession, count_profession = self.get_data_area()
-        salary_area_dict, top_area_proportion = self.get_data_areas()
+        Report.render_pdf(self.profession, self.area_name, self.get_data_area(), self.get_data_areas(), 'report(3.4.3).pdf')
+
+    def make_pdfs(self, queries):
+        '''Создает отчеты по нескольким парам (профессия, город), данные читаются и обрабатываются один раз:
+        строится куб по профессиям, городам и годам, отчет по каждой паре - выборка из него
+        :param queries: список пар (профессия, город)
+        :return: pdf-файлы report(3.4.3) <профессия> <город>.pdf
+        '''
+        data_areas = self.get_data_areas()
+        for (profession, area_name), data_area in self.get_batch_data_area(queries).items():
+            Report.render_pdf(profession, area_name, data_area, data_areas, f'report(3.4.3) {profession} {area_name}.pdf')
+
+    @staticmethod
+    def render_pdf(profession, area_name, data_area, data_areas, output_file_name):
+        '''Формирует pdf-файл по словарям с аналитикой
+        :param profession: название профессии
+        :param area_name: название города
+        :param data_area: salary_profession, count_profession (результат get_data_area)
+        :param data_areas: salary_area_dict, top_area_proportion (результат get_data_areas)
+        :param output_file_name: название pdf-файла
+        '''
+        salary_profession, count_profession = data_area
+        salary_area_dict, top_area_proportion = data_areas
         template = Environment(loader=FileSystemLoader('.')).get_template('pdf_template(3.4.3).html')
         table1 = [[year, salary_profession[year], count_profession[year]] for year in count_profession]
-        pdf_template = template.render({'profession': self.profession, 'area': self.area_name, 'table1': table1,
+        pdf_template = template.render({'profession': profession, 'area': area_name, 'table1': table1,
                                         'salary_area': salary_area_dict.items(),
                                         'top_area_proportion': top_area_proportion.items()})
         config = pdfkit.configuration(wkhtmltopdf=r'C:\Users\kh_ju\homework python\wkhtmltopdf\bin\wkhtmltopdf.exe')
-        pdfkit.from_string(pdf_template, 'report(3.4.3).pdf', configuration=config, options={"enable-local-file-access": ""})
+        pdfkit.from_string(pdf_template, output_file_name, configuration=config, options={"enable-local-file-access": ""})
 
-file_name = input('Введите название файла: ')
-profession = input('Введите название профессии: ').lower()
-area_name = input('Введите название региона: ')
-report = Report(file_name, profession, area_name)
-report.make_pdf()
+if __name__ == '__main__':
+    file_name = input('Введите название файла: ')
+    professions = [profession.strip() for profession in input("Введите название профессии (несколько - через ';'): ").lower().split(';')]
+    areas = [area_name.strip() for area_name in input("Введите название региона (несколько - через ';'): ").split(';')]
+    report = Report(file_name, professions[0], areas[0], use_cache=True)
+    if len(professions) == 1 and len(areas) == 1:
+        report.make_pdf()
+    else:
+        report.make_pdfs([(profession, area_name) for profession in professions for area_name in areas])
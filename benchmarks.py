@@ -0,0 +1,210 @@
+import importlib.util
+import os
+import re
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+from time import perf_counter
+
+import pandas as pd
+
+from main import DataSet, Vacancy
+
+
+def load_module(file_name):
+    """Импортирует модуль из файла, название которого не является именем модуля, например convert_currencies(3.4.1).py.
+    Модуль регистрируется в sys.modules, чтобы его функции можно было передавать в другие процессы.
+
+    :param file_name: название файла
+    :return: модуль
+    """
+    name = re.sub(r'\W', '_', file_name[:-len('.py')])
+    spec = importlib.util.spec_from_file_location(name, file_name)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure(func, *args):
+    """Замеряет время работы функции и пиковое потребление памяти.
+
+    :param func: замеряемая функция
+    :param args: аргументы функции
+    :return: результат функции, время работы в секундах, пиковая память в мегабайтах
+    """
+    tracemalloc.start()
+    start = perf_counter()
+    result = func(*args)
+    elapsed = perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def load_list(file_name):
+    """Прежний способ загрузки: файл читается дважды, строки хранятся в нескольких списках.
+
+    :param file_name: название файла
+    :return: количество вакансий
+    """
+    headings, lines = DataSet.csv_reader(file_name)[0], DataSet.csv_reader(file_name)[1]
+    vacancies = []
+    for vacancy in DataSet.csv_filter(headings, lines):
+        vacancy = Vacancy([vacancy['name'], vacancy['salary_from'], vacancy['salary_to'],
+                           vacancy['salary_currency'], vacancy['area_name'], vacancy['published_at']])
+        vacancy.published_at = DataSet.get_year(vacancy.published_at)
+        vacancies.append(vacancy)
+    return len(vacancies)
+
+
+def load_dataset(file_name):
+    """Загрузка через DataSet.get_dataset: один проход по файлу, в памяти хранятся только объекты Vacancy.
+
+    :param file_name: название файла
+    :return: количество вакансий
+    """
+    return len(DataSet.get_dataset(file_name).vacancies_objects)
+
+
+def load_stream(file_name):
+    """Потоковая загрузка через DataSet.iter_vacancies: в памяти находится одна вакансия.
+
+    :param file_name: название файла
+    :return: количество вакансий
+    """
+    return sum(1 for _ in DataSet.iter_vacancies(file_name))
+
+
+def benchmark_loader(file_name):
+    """Сравнивает способы загрузки CSV файла и печатает время и пиковую память каждого из них.
+
+    :param file_name: название файла
+    """
+    print(f"Загрузка {file_name}")
+    for title, func in (("списки (прежний способ)", load_list),
+                        ("DataSet.get_dataset", load_dataset),
+                        ("DataSet.iter_vacancies", load_stream)):
+        count, elapsed, peak = measure(func, file_name)
+        print(f"{title}: {count} вакансий, {elapsed:.2f} c, пик памяти {peak:.1f} МБ")
+
+
+def benchmark_converter(file_name, chunk_size=200000, workers=(1, 2, 4, 8)):
+    """Конвертирует файл с разным количеством процессов и печатает время и ускорение относительно одного процесса.
+
+    :param file_name: название исходного файла с вакансиями
+    :param chunk_size: количество строк в одной части
+    :param workers: количества процессов
+    """
+    converter = load_module('convert_currencies(3.4.1).py').Converter
+    print(f"Конвертация {file_name}, ядер: {os.cpu_count()}")
+    with tempfile.TemporaryDirectory() as directory:
+        base = None
+        for processes in workers:
+            start = perf_counter()
+            converter(file_name, 'currency_2003-2022.csv', chunk_size=chunk_size,
+                      processes=processes).make_csv(os.path.join(directory, f'{processes}.csv'))
+            elapsed = perf_counter() - start
+            base = base or elapsed
+            print(f"процессов: {processes}, {elapsed:.2f} c, ускорение {base / elapsed:.2f}")
+
+
+def get_data_file_apply(file_name, profession):
+    """Прежнее ядро DataSet.get_data_file из multiprocessin.py: зарплата и год считаются apply по строкам.
+
+    :param file_name: название файла
+    :param profession: название профессии
+    :return: год, средняя зп, количество вакансий, средняя зп профессии, количество вакансий профессии
+    """
+    file = pd.read_csv(file_name)
+    data = file[file['name'].str.contains(profession)]
+    year = file['published_at'].apply(lambda x: x[:4]).unique()[0]
+    mid_salary = round(file.apply(lambda x: (x['salary_from'] + x['salary_to']) * 0.5, axis=1).mean())
+    mid_prof_salary = round(data.apply(lambda x: (x['salary_from'] + x['salary_to']) * 0.5, axis=1).mean())
+    return year, mid_salary, file.shape[0], mid_prof_salary, data.shape[0]
+
+
+def benchmark_worker(directory, profession='Программист'):
+    """Сравнивает время обработки каждого файла прежним ядром и векторизованным DataSet.get_data_file.
+
+    :param directory: каталог с файлами по годам
+    :param profession: название профессии
+    """
+    import multiprocessin
+    dataset = multiprocessin.DataSet()
+    dataset.file_name, dataset.profession = directory, profession
+    for file_name in sorted(os.listdir(directory)):
+        start = perf_counter()
+        old = get_data_file_apply(os.path.join(directory, file_name), profession)
+        old_elapsed = perf_counter() - start
+        start = perf_counter()
+        new = dataset.get_data_file(file_name)
+        new_elapsed = perf_counter() - start
+        print(f"{file_name}: apply {old_elapsed:.3f} c, векторно {new_elapsed:.3f} c, "
+              f"ускорение {old_elapsed / new_elapsed:.1f}, результаты {'совпадают' if old == new else 'различаются'}")
+
+
+def benchmark_backends(directory, workers=None, chunksize=None):
+    """Запускает одну и ту же обработку файлов по годам всеми способами выполнения Executor
+    и печатает время, процессорное время (с дочерними процессами) и ускорение относительно serial.
+
+    :param directory: каталог с файлами по годам
+    :param workers: количество потоков или процессов, по умолчанию - количество ядер
+    :param chunksize: количество частей, передаваемых процессу за один раз, по умолчанию - Executor.get_chunksize
+    """
+    import multiprocessin
+    from executors import Executor
+    print(f"Обработка {directory}, ядер: {os.cpu_count()}")
+    base = None
+    expected = None
+    for backend in Executor.backends:
+        dataset = multiprocessin.DataSet()
+        dataset.file_name = directory
+        start, start_times = perf_counter(), os.times()
+        dataset.get_analytics(backend, workers, chunksize=chunksize)
+        elapsed, times = perf_counter() - start, os.times()
+        cpu = sum(times[:4]) - sum(start_times[:4])
+        result = dataset.get_data_dict() + tuple(dataset.cities)
+        base = base or elapsed
+        expected = expected or result
+        print(f"{backend}: {elapsed:.2f} c, процессорное время {cpu:.2f} c, ускорение {base / elapsed:.2f}, "
+              f"результаты {'совпадают' if result == expected else 'различаются'}")
+
+
+def benchmark_harvester(file_name, delay=0.05, limits=(1, 4, 10, 20)):
+    """Выгружает вакансии файла из локального HHStubServer с задержкой ответа с разным количеством
+    одновременных запросов и печатает время, количество запросов и пиковую память.
+
+    :param file_name: CSV-файл с вакансиями за один день, который отдает сервер
+    :param delay: задержка ответа сервера в секундах
+    :param limits: количества одновременных запросов
+    """
+    from hh_api_stub import HHStubServer
+    fetcher_class = load_module('vacanciesHH(3.3.3).py').VacanciesFetcher
+    day = datetime.strptime(pd.read_csv(file_name, nrows=1)['published_at'][0][:10], '%Y-%m-%d')
+    print(f"Выгрузка {file_name} с сервера с задержкой {delay} c")
+    with tempfile.TemporaryDirectory() as directory:
+        base = None
+        for limit in limits:
+            with HHStubServer(file_name, delay=delay) as server:
+                fetcher = fetcher_class(url=server.url, limit=limit)
+                count, elapsed, peak = measure(fetcher.make_csv, os.path.join(directory, f'{limit}.csv'),
+                                               day, day + timedelta(days=1))
+            base = base or elapsed
+            print(f"одновременных запросов: {limit}, {count} вакансий, {fetcher.requests_count} запросов, "
+                  f"{elapsed:.2f} c, ускорение {base / elapsed:.2f}, пик памяти {peak:.1f} МБ")
+
+
+benchmarks = {
+    'loader': (benchmark_loader, 'vacancies_by_year.csv'),
+    'converter': (benchmark_converter, 'vacancies_dif_currencies.csv'),
+    'worker': (benchmark_worker, 'csv_split_files'),
+    'backends': (benchmark_backends, 'csv_split_files'),
+    'harvester': (benchmark_harvester, 'vacanciesHH_2022-12-25.csv'),
+}
+
+if __name__ == '__main__':
+    name = sys.argv[1] if len(sys.argv) > 1 else 'loader'
+    benchmark, file_name = benchmarks[name]
+    benchmark(sys.argv[2] if len(sys.argv) > 2 else file_name)
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+
+class ColumnsCache:
+    """Бинарный колоночный снимок разобранного CSV-файла, который сохраняется рядом с файлом в каталоге <файл>.cache.
+
+    Числовые колонки хранятся в файлах .npy и при загрузке отображаются в память (mmap), строковые колонки -
+    одной строкой UTF-8 с разделителем '\\0'. Снимок действителен, пока не изменились размер, время изменения
+    и хэш начала и конца исходного файла.
+
+    Attributes:
+        file_name (str): название исходного CSV-файла
+        directory (str): каталог снимка
+    """
+    version = 1
+    separator = '\0'
+    sample_size = 1 << 20
+
+    def __init__(self, file_name):
+        """Инициализирует объект ColumnsCache.
+
+        :param file_name: название исходного CSV-файла
+        """
+        self.file_name = file_name
+        self.directory = f"{file_name}.cache"
+
+    def get_source_key(self):
+        """Вычисляет ключ исходного файла: размер, время изменения и хэш первого и последнего мегабайта.
+
+        :return: str: ключ
+        """
+        stat = os.stat(self.file_name)
+        digest = hashlib.blake2b(f"{ColumnsCache.version} {stat.st_size} {stat.st_mtime_ns}".encode())
+        with open(self.file_name, mode='rb') as file:
+            digest.update(file.read(ColumnsCache.sample_size))
+            file.seek(max(0, stat.st_size - ColumnsCache.sample_size))
+            digest.update(file.read())
+        return digest.hexdigest()
+
+    def is_valid(self):
+        """Проверяет, что снимок есть и построен по текущей версии исходного файла.
+
+        :return: bool
+        """
+        key_file_name = os.path.join(self.directory, 'source.key')
+        if not os.path.exists(key_file_name):
+            return False
+        with open(key_file_name, mode='r') as file:
+            return file.read() == self.get_source_key()
+
+    def save(self, columns):
+        """Сохраняет колонки. Снимок сначала пишется во временный каталог, который затем переименовывается,
+        поэтому прерванная запись не оставляет испорченного снимка.
+
+        :param columns: словарь, где ключ - название колонки, значение - массив NumPy или список строк (None - пропуск)
+        :return: bool: True, если снимок сохранен (строки с символом '\\0' не сохраняются)
+        """
+        temporary = f"{self.directory}.{os.getpid()}.tmp"
+        os.makedirs(temporary, exist_ok=True)
+        headings = []
+        for number, (name, values) in enumerate(columns.items()):
+            if isinstance(values, np.ndarray):
+                np.save(os.path.join(temporary, f"{number}.npy"), values)
+                headings.append([name, 'array', len(values)])
+                continue
+            if any(value is not None and ColumnsCache.separator in value for value in values):
+                shutil.rmtree(temporary)
+                return False
+            with open(os.path.join(temporary, f"{number}.str"), mode='wb') as file:
+                file.write(ColumnsCache.separator.join('' if value is None else value for value in values).encode('utf-8'))
+            missing = np.array([value is None for value in values], dtype=bool)
+            if missing.any():
+                np.save(os.path.join(temporary, f"{number}.na.npy"), missing)
+            headings.append([name, 'strings', len(values)])
+        with open(os.path.join(temporary, 'columns.json'), mode='w', encoding='utf-8') as file:
+            json.dump(headings, file, ensure_ascii=False)
+        with open(os.path.join(temporary, 'source.key'), mode='w') as file:
+            file.write(self.get_source_key())
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.replace(temporary, self.directory)
+        return True
+
+    def load(self):
+        """Загружает колонки снимка.
+
+        :return: dict: ключ - название колонки, значение - массив NumPy (только для чтения) или список строк
+        """
+        with open(os.path.join(self.directory, 'columns.json'), mode='r', encoding='utf-8') as file:
+            headings = json.load(file)
+        columns = dict()
+        for number, (name, kind, length) in enumerate(headings):
+            if kind == 'array':
+                columns[name] = np.load(os.path.join(self.directory, f"{number}.npy"), mmap_mode='r')
+                continue
+            with open(os.path.join(self.directory, f"{number}.str"), mode='rb') as file:
+                content = file.read().decode('utf-8')
+            values = content.split(ColumnsCache.separator) if length else []
+            missing_file_name = os.path.join(self.directory, f"{number}.na.npy")
+            if os.path.exists(missing_file_name):
+                for row in np.flatnonzero(np.load(missing_file_name)):
+                    values[row] = None
+            columns[name] = values
+        return columns
+
+    def read_csv(self):
+        """Читает CSV-файл в DataFrame через снимок: при первом чтении файл разбирается pd.read_csv
+        и снимок сохраняется, при следующих - DataFrame собирается из снимка без разбора текста.
+
+        :return: DataFrame
+        """
+        if self.is_valid():
+            return pd.DataFrame(self.load())
+        data = pd.read_csv(self.file_name)
+        self.save({name: data[name].to_numpy() if data[name].dtype.kind in 'biuf'
+                   else [None if pd.isna(value) else str(value) for value in data[name]] for name in data.columns})
+        return data
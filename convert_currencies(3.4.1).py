@@ -1,53 +1,213 @@
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
 import numpy as np
 import pandas as pd
 
+from columns_cache import ColumnsCache
+from currency_rates import CurrencyRates
+
+worker_converter = None
+
 class Converter:
     """Конвертирует оклад в рубли.
     Attribures:
-            file_name (DataFrame) : исходный файл
-            converter_file_name (DataFrame) : файл для преобразования валют
+            file_name (DataFrame) : исходный файл (None при обработке по частям)
+            source_file_name (str) : название исходного файла
+            chunk_size (int) : количество строк в одной части, None - файл обрабатывается целиком
+            processes (int) : количество процессов для конвертации частей файла
+            currency_rates (CurrencyRates) : курсы валют из файла для преобразования валют
+            rates (tuple) : месяцы, валюты и матрица курсов из файла для преобразования валют
     """
-    def __init__(self, file_name, converter_file_name):
-        """Инициализирует класс Converter
-        """
-        self.file_name = pd.read_csv(file_name)
-        self.converter_file_name = pd.read_csv(converter_file_name)
-
-    def converter(self, salary, converter_file):
-        """Возращает сковертированную зарплату по указанной дате.
-        :param salary: зарплата
-        :param: converter_file: файл для преобразования валют
-        :return: сконвертированная зарплата
-        """
-        data = salary.split()
-        if pd.isnull(salary):
-            return salary
-        currency = data[1]
-        if currency in converter_file.columns:
-            date = data[2]
-            course = converter_file[converter_file["dat"] == date[:7]][currency].values
-            if not np.isnan(course[0]):
-                return round(course[0] * float(data[0]))
-        return salary
+    def __init__(self, file_name, converter_file_name, chunk_size=None, processes=1, use_cache=False):
+        """Инициализирует класс Converter.
+        Если задан chunk_size, исходный файл не загружается в память целиком, а читается по частям в make_csv.
+        Части файла конвертируются в processes процессах. Если задан use_cache, файл читается через бинарный
+        снимок ColumnsCache, который сохраняется рядом с файлом. Снимок есть только у режима без chunk_size:
+        строковые колонки снимка загружаются целиком, а обработка по частям нужна, чтобы файл целиком
+        в памяти не держать, поэтому use_cache вместе с chunk_size - ошибка (ValueError).
+        """
+        if use_cache and chunk_size is not None:
+            raise ValueError("use_cache работает только без chunk_size: части файла читаются из CSV, а не из снимка")
+        self.source_file_name = file_name
+        self.chunk_size = chunk_size
+        self.processes = processes
+        self.file_name = None
+        if chunk_size is None:
+            self.file_name = ColumnsCache(file_name).read_csv() if use_cache else pd.read_csv(file_name)
+        self.currency_rates = CurrencyRates.from_csv(converter_file_name)
+        self.rates = self.get_rates()
+
+    def get_rates(self):
+        """Индексирует матрицу курсов месяц × валюта для поиска по столбцам DataFrame.
+        Для повторяющегося месяца используется первая строка, как при поиске по столбцу "dat".
+
+        :return: months (Index): месяцы в формате ГГГГ-ММ
+                 currencies (Index): названия валют
+                 rates (ndarray): матрица курсов, строки - месяцы, столбцы - валюты
+        """
+        return (pd.Index(list(self.currency_rates.months)), pd.Index(list(self.currency_rates.currencies)),
+                self.currency_rates.rates)
+
+    def __getstate__(self):
+        """Матрица курсов передается в процессы вместе с currency_rates (через разделяемую память, если она включена),
+        поэтому rates не сериализуется, а восстанавливается в __setstate__.
+        """
+        return dict(self.__dict__, rates=None)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.rates = self.get_rates()
+
+    def convert_salary(self, data):
+        """Возвращает столбец со сконвертированной по дате публикации зарплатой для всех вакансий сразу.
+        Курс находится по индексам месяца и валюты в матрице курсов, без поиска по файлу для каждой вакансии.
+        Если курса нет, в столбце остается строка "зарплата валюта дата", если нет валюты - пустое значение.
+
+        :param data: DataFrame с колонками salary_from, salary_to, salary_currency, published_at
+        :return: Series со сконвертированной зарплатой
+        """
+        months, currencies, rates = self.rates
+        salary = data[["salary_from", "salary_to"]].mean(axis=1)
+        result = (salary.astype(str) + " " + data["salary_currency"] + " " + data["published_at"]).astype(object)
+        month_index = months.get_indexer(data["published_at"].str[:7])
+        currency_index = currencies.get_indexer(data["salary_currency"])
+        found = (month_index >= 0) & (currency_index >= 0) & salary.notna().to_numpy()
+        course = np.full(len(data), np.nan)
+        course[found] = rates[month_index[found], currency_index[found]]
+        converted = ~np.isnan(course)
+        result[converted] = list(np.rint(course[converted] * salary.to_numpy()[converted]).astype(np.int64))
+        return result
+
+    def convert_data(self, data):
+        """Заменяет колонки salary_from, salary_to и salary_currency колонкой salary со сконвертированной зарплатой.
+
+        :param data: DataFrame с вакансиями (весь файл или его часть)
+        :return: новый DataFrame
+        """
+        data.insert(1, "salary", self.convert_salary(data))
+        return data.drop(columns=['salary_from', 'salary_to', 'salary_currency'])
+
     def get_converted_data(self):
         """Подготавливает данные для CSV-файла.
         """
-        self.file_name.insert(1, "salary", None)
-        self.file_name["salary"] = self.file_name[["salary_from", "salary_to"]].mean(axis=1)
-        self.file_name["salary"] = self.file_name["salary"].astype(str) + " " + + self.file_name["salary_currency"] + " " + self.file_name["published_at"]
-        self.file_name["salary"] = self.file_name["salary"].apply(lambda salary: self.converter(salary, self.converter_file_name))
-
-        self.file_name = self.file_name.drop(columns=['salary_from', 'salary_to', 'salary_currency'])
+        self.file_name = self.convert_data(self.file_name)
 
-    def make_csv(self):
+    def make_csv(self, output_file_name="full_converted_vacancies_dif_currencies(3.4.1).csv", rows_limit=4074961):
         """Создает CSV-файл.
+
+        :param output_file_name: название итогового файла
+        :param rows_limit: максимальное количество строк в итоговом файле
         """
+        if self.chunk_size is not None:
+            self.make_csv_by_chunks(output_file_name, rows_limit)
+            return
         self.get_converted_data()
-        converted_currencies = self.file_name.head(4074961)
-        converted_currencies.to_csv("full_converted_vacancies_dif_currencies(3.4.1).csv", index=False, encoding='utf-8-sig')
+        converted_currencies = self.file_name.head(rows_limit)
+        converted_currencies.to_csv(output_file_name, index=False, encoding='utf-8-sig')
+
+    def make_csv_by_chunks(self, output_file_name, rows_limit):
+        """Создает CSV-файл, читая, конвертируя и дописывая исходный файл частями по chunk_size строк.
+        Части записываются в исходном порядке, в памяти одновременно находится не больше двух частей на процесс.
+        Печатает скорость обработки.
+
+        :param output_file_name: название итогового файла
+        :param rows_limit: максимальное количество строк в итоговом файле
+        """
+        start = perf_counter()
+        rows = 0
+        blocks = Converter.read_blocks(self.source_file_name, self.chunk_size, rows_limit)
+        with open(output_file_name, mode='w', encoding='utf-8-sig', newline='') as file:
+            for block_rows, text in self.convert_blocks(blocks):
+                file.write(text)
+                rows += block_rows
+                print(f"Обработано строк: {rows}, {rows / (perf_counter() - start):.0f} строк/с")
+
+    def convert_blocks(self, blocks):
+        """Конвертирует части файла в текущем процессе или в пуле процессов, сохраняя их порядок.
+        Для пула процессов матрица курсов переносится в разделяемую память, процессы не получают каждый свою копию.
+
+        :param blocks: части файла из read_blocks
+        :return: generator: количество строк и текст CSV для каждой части
+        """
+        if self.processes == 1:
+            init_worker(self)
+            yield from map(convert_block, blocks)
+            return
+        self.currency_rates.share()
+        try:
+            with ProcessPoolExecutor(max_workers=self.processes, initializer=init_worker, initargs=(self,)) as executor:
+                pending = deque()
+                for block in blocks:
+                    pending.append(executor.submit(convert_block, block))
+                    if len(pending) >= 2 * self.processes:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+        finally:
+            self.currency_rates.release()
+
+    @staticmethod
+    def read_blocks(file_name, chunk_size, rows_limit):
+        """Делит исходный файл на части по chunk_size строк без разбора CSV.
+        Строка с переносом внутри кавычек считается одной строкой.
+
+        :param file_name: название исходного файла
+        :param chunk_size: количество строк в части
+        :param rows_limit: максимальное количество строк во всех частях
+        :return: generator: кортежи (номер части, строка заголовков, строки части в байтах, количество строк)
+        """
+        with open(file_name, mode='rb') as file:
+            header = file.readline()
+            index = 0
+            lines = []
+            rows = 0
+            total = 0
+            quoted = False
+            for line in file:
+                lines.append(line)
+                if line.count(b'"') % 2 == 1:
+                    quoted = not quoted
+                if quoted:
+                    continue
+                rows += 1
+                total += 1
+                if rows == chunk_size or total == rows_limit:
+                    yield index, header, b''.join(lines), rows
+                    index += 1
+                    lines = []
+                    rows = 0
+                    if total == rows_limit:
+                        return
+            if rows > 0:
+                yield index, header, b''.join(lines), rows
+
+
+def init_worker(converter):
+    """Сохраняет конвертер в процессе, чтобы таблица курсов передавалась в процесс один раз, а не с каждой частью.
+
+    :param converter: объект класса Converter
+    """
+    global worker_converter
+    worker_converter = converter
+
+
+def convert_block(block):
+    """Разбирает и конвертирует одну часть исходного файла.
+
+    :param block: кортеж из Converter.read_blocks
+    :return: количество строк и текст CSV со сконвертированной частью (заголовки только у первой части)
+    """
+    index, header, lines, rows = block
+    data = worker_converter.convert_data(pd.read_csv(io.BytesIO(header + lines)))
+    return rows, data.to_csv(index=False, header=index == 0)
 
 file_name = "vacancies_dif_currencies.csv"
 converter_file_name = "currency_2003-2022.csv"
 if __name__ == '__main__':
-    converter = Converter(file_name=file_name, converter_file_name=converter_file_name)
+    converter = Converter(file_name=file_name, converter_file_name=converter_file_name, chunk_size=200000,
+                          processes=os.cpu_count())
     converter.make_csv()
@@ -0,0 +1,222 @@
+import csv
+import math
+import os
+import sqlite3
+
+import numpy as np
+
+from shared_arrays import SharedArray
+
+
+class CurrencyRates:
+    """Таблица курсов валют ЦБ РФ по месяцам, загружаемая один раз из CSV-файла или базы SQLite.
+
+    Attributes:
+        months (dict): индексы строк матрицы, ключ - месяц в формате ГГГГ-ММ
+        currencies (dict): индексы столбцов матрицы, ключ - название валюты
+        rates (np.ndarray): матрица курсов месяц × валюта (float64, NaN - курса нет)
+        cache (dict): запомненные курсы, ключ - (валюта, месяц)
+        hits (int): количество курсов, найденных в cache
+        misses (int): количество курсов, найденных в матрице
+        shared (tuple): описание матрицы в разделяемой памяти (None - матрица в памяти процесса)
+        memory (SharedMemory): блок разделяемой памяти с матрицей
+    """
+    def __init__(self, months, currencies, rates):
+        """Инициализирует объект CurrencyRates.
+
+        :param months: список месяцев в формате ГГГГ-ММ (для повторяющегося месяца используется первая строка)
+        :param currencies: список названий валют
+        :param rates: матрица курсов месяц × валюта
+        """
+        first_rows = dict()
+        for index, month in enumerate(months):
+            first_rows.setdefault(month, index)
+        self.months = {month: index for index, month in enumerate(first_rows)}
+        self.currencies = {currency: index for index, currency in enumerate(currencies)}
+        self.rates = np.asarray(rates, dtype=np.float64).reshape(len(months), len(currencies))[list(first_rows.values())]
+        self.cache = dict()
+        self.hits = 0
+        self.misses = 0
+        self.shared = None
+        self.memory = None
+
+    def share(self):
+        """Переносит матрицу курсов в разделяемую память: при передаче объекта в другие процессы (pickle)
+        передается только описание матрицы, процессы читают одну и ту же копию.
+        """
+        if self.shared is None:
+            self.memory, self.rates, self.shared = SharedArray.create(self.rates)
+
+    def release(self):
+        """Возвращает матрицу курсов в память процесса и удаляет блок разделяемой памяти, созданный share.
+        """
+        if self.shared is not None:
+            self.rates = self.rates.copy()
+            self.memory.close()
+            self.memory.unlink()
+            self.shared = None
+            self.memory = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__, memory=None)
+        if self.shared is not None:
+            state['rates'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.shared is not None:
+            self.memory, self.rates = SharedArray.attach(self.shared)
+
+    @staticmethod
+    def from_rows(headings, rows):
+        """Формирует таблицу курсов из строк с колонкой dat и колонками валют.
+
+        :param headings: заголовки, первый из них - dat
+        :param rows: строки таблицы, пустое значение или None - курса нет
+        :return: объект класса CurrencyRates
+        """
+        months = []
+        rates = []
+        for row in rows:
+            months.append(row[0])
+            rates.append([np.nan if value in ('', None) else float(value) for value in row[1:]])
+        return CurrencyRates(months, headings[1:], rates)
+
+    @staticmethod
+    def from_csv(file_name):
+        """Загружает курсы из CSV-файла, созданного Currency.make_csv.
+
+        :param file_name: название файла, например currency_2003-2022.csv
+        :return: объект класса CurrencyRates
+        """
+        with open(file_name, mode='r', encoding='utf-8-sig') as file:
+            reader = csv.reader(file)
+            headings = next(reader)
+            return CurrencyRates.from_rows(headings, list(reader))
+
+    @staticmethod
+    def from_db(file_name, table_name='currency_2003-2022'):
+        """Загружает курсы из базы SQLite, созданной sql(3.5.1).py.
+
+        :param file_name: название файла базы, например currency_2003-2022.db
+        :param table_name: название таблицы
+        :return: объект класса CurrencyRates
+        """
+        with sqlite3.connect(file_name) as connection:
+            cursor = connection.execute(f'SELECT * FROM "{table_name}" ORDER BY dat')
+            headings = [column[0] for column in cursor.description]
+            return CurrencyRates.from_rows(headings, cursor.fetchall())
+
+    def get_rate(self, currency, month):
+        """Возвращает курс валюты к рублю за месяц. Курс каждой пары (валюта, месяц) ищется в матрице один раз.
+
+        :param currency: название валюты
+        :param month: месяц в формате ГГГГ-ММ
+        :return: float: курс (1 для рубля) или None, если курса нет
+
+        >>> rates = CurrencyRates(['2003-01'], ['USD', 'BYR'], [[31.7844, float('nan')]])
+        >>> rates.get_rate('USD', '2003-01'), rates.get_rate('BYR', '2003-01'), rates.get_rate('RUR', '2003-01')
+        (31.7844, None, 1.0)
+        """
+        key = (currency, month)
+        if key in self.cache:
+            self.hits += 1
+            return self.cache[key]
+        self.misses += 1
+        rate = self.lookup(currency, month)
+        self.cache[key] = rate
+        return rate
+
+    def lookup(self, currency, month):
+        """Находит курс в матрице без запоминания.
+
+        :param currency: название валюты
+        :param month: месяц в формате ГГГГ-ММ
+        :return: float: курс (1 для рубля) или None, если курса нет
+        """
+        if currency == 'RUR':
+            return 1.0
+        if currency not in self.currencies or month not in self.months:
+            return None
+        rate = float(self.rates[self.months[month], self.currencies[currency]])
+        return None if math.isnan(rate) else rate
+
+    def get_csv_rows(self):
+        """Формирует строки CSV-файла с курсами.
+
+        :return: list: строки, первая ячейка - месяц, пустая ячейка - курса нет
+        """
+        return [[month] + ['' if math.isnan(rate) else repr(float(rate)) for rate in self.rates[index]]
+                for month, index in self.months.items()]
+
+    def to_csv(self, file_name):
+        """Сохраняет курсы в CSV-файл в том же формате, в котором их читает from_csv.
+
+        :param file_name: название файла
+        """
+        with open(file_name, mode='w', encoding='utf-8-sig', newline='') as file:
+            writer = csv.writer(file, lineterminator=os.linesep)
+            writer.writerow(['dat'] + list(self.currencies))
+            writer.writerows(self.get_csv_rows())
+
+    def append_csv(self, file_name):
+        """Дописывает курсы в конец существующего CSV-файла с такими же колонками, не перечитывая его.
+
+        :param file_name: название файла
+        """
+        with open(file_name, mode='a', encoding='utf-8', newline='') as file:
+            csv.writer(file, lineterminator=os.linesep).writerows(self.get_csv_rows())
+
+    def to_db(self, file_name, table_name='currency_2003-2022', since=None):
+        """Добавляет курсы в таблицу SQLite или обновляет уже существующие месяцы (upsert).
+        Таблица создается с первичным ключом dat; у таблицы, созданной раньше через pandas.to_sql,
+        создается уникальный индекс по dat.
+
+        :param file_name: название файла базы
+        :param table_name: название таблицы
+        :param since: месяц в формате ГГГГ-ММ, записываются только более поздние месяцы; None - все
+        """
+        columns = list(self.currencies)
+        with sqlite3.connect(file_name) as connection:
+            connection.execute(f'CREATE TABLE IF NOT EXISTS "{table_name}" (dat TEXT PRIMARY KEY, '
+                               + ', '.join(f'"{column}" REAL' for column in columns) + ')')
+            existing = [row[1] for row in connection.execute(f'PRAGMA table_info("{table_name}")')]
+            for column in columns:
+                if column not in existing:
+                    connection.execute(f'ALTER TABLE "{table_name}" ADD COLUMN "{column}" REAL')
+            connection.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "{table_name}_dat" ON "{table_name}" (dat)')
+            names = ', '.join(f'"{column}"' for column in columns)
+            updates = ', '.join(f'"{column}" = excluded."{column}"' for column in columns)
+            rows = [[month] + [None if math.isnan(rate) else float(rate) for rate in self.rates[index]]
+                    for month, index in self.months.items() if since is None or month > since]
+            connection.executemany(f'INSERT INTO "{table_name}" (dat, {names}) VALUES ({", ".join("?" * (len(columns) + 1))}) '
+                                   f'ON CONFLICT(dat) DO UPDATE SET {updates}', rows)
+
+    @staticmethod
+    def get_csv_bounds(file_name):
+        """Читает заголовки и последний месяц CSV-файла с курсами, не читая файл целиком.
+
+        :param file_name: название файла
+        :return: заголовки (list) и последний месяц в формате ГГГГ-ММ (None, если строк с курсами нет)
+        """
+        with open(file_name, mode='rb') as file:
+            headings = next(csv.reader([file.readline().decode('utf-8-sig')]))
+            header_end = file.tell()
+            file.seek(0, os.SEEK_END)
+            file.seek(max(header_end, file.tell() - 4096))
+            lines = file.read().decode('utf-8').splitlines()
+        return headings, lines[-1].split(',')[0] if lines else None
+
+    @staticmethod
+    def get_db_last_month(file_name, table_name='currency_2003-2022'):
+        """Возвращает последний месяц в таблице SQLite.
+
+        :param file_name: название файла базы
+        :param table_name: название таблицы
+        :return: месяц в формате ГГГГ-ММ или None, если таблицы или строк нет
+        """
+        with sqlite3.connect(file_name) as connection:
+            if connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)).fetchone() is None:
+                return None
+            return connection.execute(f'SELECT MAX(dat) FROM "{table_name}"').fetchone()[0]
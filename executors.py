@@ -0,0 +1,114 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class Executor:
+    """Применяет функцию к списку задач выбранным способом выполнения.
+
+    Способы: serial - в текущем потоке, thread - пул потоков, process - пул процессов concurrent.futures,
+    imap_unordered - multiprocessing.Pool.imap_unordered частями по chunksize задач,
+    asyncio - asyncio.to_thread с ограничением одновременно выполняемых задач.
+    Для imap_unordered порядок результатов не совпадает с порядком задач.
+
+    Attributes:
+        backend (str): способ выполнения
+        workers (int): количество потоков или процессов
+        chunksize (int): количество задач, передаваемых процессу за один раз (None - подбирается по количеству задач)
+    """
+    backends = ('serial', 'thread', 'process', 'imap_unordered', 'asyncio')
+
+    def __init__(self, backend='process', workers=None, chunksize=None):
+        """Инициализирует объект Executor.
+
+        :param backend: способ выполнения
+        :param workers: количество потоков или процессов, по умолчанию - количество ядер
+        :param chunksize: количество задач, передаваемых процессу за один раз, по умолчанию - get_chunksize
+        """
+        if backend not in Executor.backends:
+            raise ValueError(f"Неизвестный способ выполнения: {backend}, доступны: {', '.join(Executor.backends)}")
+        self.backend = backend
+        self.workers = workers or os.cpu_count()
+        self.chunksize = chunksize
+
+    def map(self, func, tasks):
+        """Применяет функцию ко всем задачам.
+
+        :param func: функция одного аргумента (для процессов - сериализуемая pickle)
+        :param tasks: список задач
+        :return: list: результаты
+        """
+        return getattr(self, f'map_{self.backend}')(func, list(tasks))
+
+    def get_chunksize(self, tasks):
+        """Возвращает количество задач, передаваемых процессу за один раз: заданное chunksize
+        или около четырех частей на процесс, чтобы процессы получали задачи пачками, но нагрузка оставалась ровной.
+
+        :param tasks: список задач
+        :return: int
+        """
+        return self.chunksize or max(1, len(tasks) // (4 * self.workers))
+
+    def map_serial(self, func, tasks):
+        """Выполняет задачи по очереди в текущем потоке.
+
+        :param func: функция одного аргумента
+        :param tasks: список задач
+        :return: list: результаты в порядке задач
+        """
+        return [func(task) for task in tasks]
+
+    def map_thread(self, func, tasks):
+        """Выполняет задачи в пуле из workers потоков.
+
+        :param func: функция одного аргумента
+        :param tasks: список задач
+        :return: list: результаты в порядке задач
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(func, tasks))
+
+    def map_process(self, func, tasks):
+        """Выполняет задачи в пуле из workers процессов concurrent.futures, передавая их пачками по get_chunksize.
+
+        :param func: функция одного аргумента, сериализуемая pickle
+        :param tasks: список задач
+        :return: list: результаты в порядке задач
+        """
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(func, tasks, chunksize=self.get_chunksize(tasks)))
+
+    def map_imap_unordered(self, func, tasks):
+        """Выполняет задачи в multiprocessing.Pool из workers процессов, передавая их пачками по get_chunksize.
+
+        :param func: функция одного аргумента, сериализуемая pickle
+        :param tasks: список задач
+        :return: list: результаты в порядке завершения задач
+        """
+        with multiprocessing.Pool(processes=self.workers) as pool:
+            return list(pool.imap_unordered(func, tasks, chunksize=self.get_chunksize(tasks)))
+
+    def map_asyncio(self, func, tasks):
+        """Выполняет задачи в потоках через asyncio (gather).
+
+        :param func: функция одного аргумента
+        :param tasks: список задач
+        :return: list: результаты в порядке задач
+        """
+        return asyncio.run(self.gather(func, tasks))
+
+    async def gather(self, func, tasks):
+        """Выполняет задачи в потоках через asyncio, одновременно - не больше workers задач.
+
+        :param func: функция одного аргумента
+        :param tasks: список задач
+        :return: list: результаты в порядке задач
+        """
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def run(task):
+            async with semaphore:
+                return await asyncio.to_thread(func, task)
+
+        return await asyncio.gather(*(run(task) for task in tasks))
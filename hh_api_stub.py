@@ -0,0 +1,101 @@
+import bisect
+import csv
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class HHStubServer:
+    """Локальный HTTP-сервер, который отвечает на запросы так же, как api.hh.ru/vacancies, вакансиями из CSV-файла
+    (например, vacanciesHH_2022-12-25.csv). Используется в тестах и замерах VacanciesFetcher.
+
+    Поддерживаются параметры date_from, date_to (ГГГГ-ММ-ДДTЧЧ:ММ:СС, конец не включается), per_page и page;
+    как и настоящий API, сервер отдает не больше max_items вакансий одного запроса, а дальше отвечает ошибкой 400.
+    Первые failures запросов завершаются ошибкой 503, каждый ответ задерживается на delay секунд.
+
+    Attributes:
+        items (list): вакансии в формате API, по возрастанию published_at
+        max_items (int): сколько вакансий одного запроса можно получить по страницам
+        delay (float): задержка ответа в секундах
+        failures (int): количество первых запросов, которые завершаются ошибкой
+        requests (list): параметры всех полученных запросов
+        url (str): адрес /vacancies
+    """
+    def __init__(self, file_name, max_items=2000, delay=0.0, failures=0):
+        """Инициализирует объект HHStubServer.
+
+        :param file_name: CSV-файл с колонками name, salary_from, salary_to, salary_currency, area_name, published_at
+        """
+        with open(file_name, mode='r', encoding='utf-8-sig') as file:
+            self.items = sorted((HHStubServer.get_item(number, row) for number, row in enumerate(csv.DictReader(file))),
+                                key=lambda item: item['published_at'])
+        self.dates = [item['published_at'][:19] for item in self.items]
+        self.max_items = max_items
+        self.delay = delay
+        self.failures = failures
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+                stub.requests.append(query)
+                time.sleep(stub.delay)
+                if len(stub.requests) <= stub.failures:
+                    self.send_error(503)
+                    return
+                status, answer = stub.get_answer(query)
+                body = json.dumps(answer, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/vacancies'
+
+    @staticmethod
+    def get_item(number, row):
+        """Преобразует строку CSV в вакансию в формате API.
+
+        :param number: номер строки (id вакансии)
+        :param row: словарь строки CSV
+        :return: dict: вакансия
+        """
+        salary = None
+        if row['salary_from'] or row['salary_to'] or row['salary_currency']:
+            salary = {'from': int(float(row['salary_from'])) if row['salary_from'] else None,
+                      'to': int(float(row['salary_to'])) if row['salary_to'] else None,
+                      'currency': row['salary_currency'] or None, 'gross': False}
+        return {'id': str(number), 'name': row['name'], 'salary': salary,
+                'area': {'id': None, 'name': row['area_name']}, 'published_at': row['published_at']}
+
+    def get_answer(self, query):
+        """Формирует ответ на запрос.
+
+        :param query: параметры запроса
+        :return: код ответа и словарь ответа
+        """
+        per_page, page = int(query.get('per_page', 20)), int(query.get('page', 0))
+        if (page + 1) * per_page > self.max_items:
+            return 400, {'errors': [{'type': 'bad_argument', 'value': 'page'}]}
+        start = bisect.bisect_left(self.dates, query.get('date_from', ''))
+        end = bisect.bisect_left(self.dates, query['date_to']) if 'date_to' in query else len(self.dates)
+        found = end - start
+        return 200, {'items': self.items[start + page * per_page:min(end, start + (page + 1) * per_page)],
+                     'found': found, 'pages': -(-min(found, self.max_items) // per_page), 'page': page,
+                     'per_page': per_page}
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
@@ -1,6 +1,7 @@
 import csv
 import math
 import re
+from array import array
 import matplotlib.pyplot as plt
 import numpy as np
 from jinja2 import Environment, FileSystemLoader
@@ -13,6 +14,10 @@ import openpyxl
 from openpyxl import Workbook
 from openpyxl.styles import Font, Border, Side
 
+from columns_cache import ColumnsCache
+from currency_rates import CurrencyRates
+from name_index import NameIndex, ProfessionMatcher
+
 currency_to_rub = {
     "AZN": 35.68,
     "BYR": 23.91,
@@ -30,6 +35,7 @@ class DataSet:
 
     Attriburies:
         file_name (str): название файла
+        columns (VacancyColumns): колоночное хранилище со всеми вакансиями
         vacancies_objects (list): список со всеми вакансиями и информацией по ним
     """
     def __init__(self, file_name):
@@ -37,10 +43,29 @@ class DataSet:
 
         Args:
             file_name (str): название файла
-            vacancies_objects (list): список со всеми вакансиями и информацией по ним
+            columns (VacancyColumns): колоночное хранилище со всеми вакансиями
         """
         self.file_name = file_name
-        self.vacancies_objects = list()
+        self.columns = VacancyColumns.from_rows([])
+        self._vacancies_objects = None
+
+    @property
+    def vacancies_objects(self):
+        """Список объектов Vacancy, который строится по колонкам только при первом обращении.
+        Статистика считается по колонкам и этот список не использует.
+
+        :return:
+            list: список объектов класса Vacancy
+        """
+        if self._vacancies_objects is None:
+            self._vacancies_objects = list(self.columns)
+        return self._vacancies_objects
+
+    def use_name_index(self):
+        """Подключает к колонкам триграммный индекс названий для поиска профессии.
+        Индекс сохраняется рядом с файлом и строится только при первом запуске или после изменения файла.
+        """
+        self.columns.name_index = NameIndex.load_or_build(self.file_name, self.columns.names)
 
     def get_year(published_at):
         return int(published_at[:4])
@@ -51,10 +76,12 @@ class DataSet:
     # def get_year_2(published_at):
     #     return datetime(int(published_at[:4]), int(published_at[5:7]), int(published_at[8:10])).year
 
-    def get_dataset(file_name):
-        """Считывает и фильтрует CSV файл, формирует объекты класса Vacancy, добавляет эти объекты в список
+    def get_dataset(file_name, use_cache=False):
+        """Считывает и фильтрует CSV файл, сохраняет вакансии в колоночное хранилище VacancyColumns
 
         :param file_name: название файла (str)
+        :param use_cache: сохранять разобранные колонки в бинарный снимок ColumnsCache рядом с файлом
+            и при следующих запусках загружать их из снимка, не разбирая CSV
         :return:
             DataSet: объект класса DataSet
 
@@ -79,17 +106,52 @@ class DataSet:
         2007
         """
         dataset = DataSet(file_name)
-        dictionary_list = DataSet.csv_filter(DataSet.csv_reader(file_name)[0], DataSet.csv_reader(file_name)[1])
-        for vacancy in dictionary_list:
-            vacancy = Vacancy([f"{vacancy['name']}", f"{vacancy['salary_from']}",
-                               f"{vacancy['salary_to']}",
-                               f"{vacancy['salary_currency']}",
-                               f"{vacancy['area_name']}",
-                               f"{vacancy['published_at']}"])
-            vacancy.published_at = DataSet.get_year(vacancy.published_at)
-            dataset.vacancies_objects.append(vacancy)
+        cache = ColumnsCache(file_name) if use_cache else None
+        if cache is not None and cache.is_valid():
+            dataset.columns = VacancyColumns.from_cache_columns(cache.load())
+            return dataset
+        dataset.columns = VacancyColumns.from_rows(DataSet.csv_rows(file_name))
+        if cache is not None:
+            cache.save(dataset.columns.get_cache_columns())
         return dataset
 
+    def iter_vacancies(file_name):
+        """Потоково формирует объекты класса Vacancy из CSV файла, не загружая файл в память целиком.
+
+        :param file_name: название файла (str)
+        :return:
+            generator: объекты класса Vacancy, у которых published_at - год публикации
+
+        >>> vacancy = next(DataSet.iter_vacancies("vacancies_by_year.csv"))
+        >>> vacancy.salary_from, vacancy.published_at
+        (35000.0, 2007)
+        """
+        for vacancy in DataSet.csv_rows(file_name):
+            vacancy = Vacancy([vacancy['name'], vacancy['salary_from'], vacancy['salary_to'],
+                               vacancy['salary_currency'], vacancy['area_name'], vacancy['published_at']])
+            vacancy.published_at = DataSet.get_year(vacancy.published_at)
+            yield vacancy
+
+    def csv_rows(file_name):
+        """Считывает CSV файл за один проход и по одной строке отдает отфильтрованные и очищенные строки.
+        Фильтрация и очистка такие же, как в csv_filter, но в памяти одновременно находится только одна строка.
+
+        :param file_name: название файла (str)
+        :return:
+            generator: словари, где
+                                    ключ: заголовок
+                                    значение: значение в строке под этим заголовком
+        """
+        with open(file_name, mode='r', encoding='utf-8-sig') as file:
+            reader = csv.reader(file)
+            headings = next(reader, None)
+            if headings is None:
+                print("Пустой файл")
+                exit(0)
+            for line in reader:
+                if len(line) == len(headings) and line.count('') == 0:
+                    yield dict(zip(headings, map(DataSet.string_filter, line)))
+
     def csv_reader(file_name):
         """Считывает CSV файл и создает список с заголовками и список с объектами Vacancy
 
@@ -181,13 +243,150 @@ class Vacancy:
         self.area_name = args[4]
         self.published_at = args[5]
 
+class VacancyColumns:
+    """Колоночное хранилище вакансий: каждое поле хранится в отдельном массиве NumPy,
+    валюты и регионы закодированы целыми числами.
+
+    Attributes:
+        names (list): названия вакансий
+        salary_from (np.ndarray): нижние границы оклада (float64)
+        salary_to (np.ndarray): верхние границы оклада (float64)
+        year (np.ndarray): годы публикации (int16)
+        month (np.ndarray): месяцы публикации (int8)
+        currency (np.ndarray): коды валют (int8)
+        currencies (list): названия валют, индекс в списке - код валюты
+        area (np.ndarray): коды регионов (int32)
+        areas (list): названия регионов, индекс в списке - код региона
+        name_index (NameIndex): индекс названий для поиска профессии (None - поиск перебором)
+    """
+    def __init__(self, names, salary_from, salary_to, year, month, currency, currencies, area, areas):
+        """Инициализирует объект VacancyColumns.
+        Коды валют и регионов присваиваются в порядке первого появления в файле.
+        """
+        self.names = names
+        self.salary_from = salary_from
+        self.salary_to = salary_to
+        self.year = year
+        self.month = month
+        self.currency = currency
+        self.currencies = currencies
+        self.area = area
+        self.areas = areas
+        self.name_index = None
+
+    @staticmethod
+    def from_rows(rows):
+        """Формирует колонки из отфильтрованных строк CSV файла, не создавая объектов Vacancy.
+
+        :param rows: итерируемый объект со словарями строк (например, DataSet.csv_rows)
+        :return: объект класса VacancyColumns
+        """
+        names = []
+        salary_from = array('d')
+        salary_to = array('d')
+        year = array('h')
+        month = array('b')
+        currency = array('b')
+        area = array('i')
+        currency_codes = dict()
+        area_codes = dict()
+        for row in rows:
+            names.append(row['name'])
+            salary_from.append(float(row['salary_from']))
+            salary_to.append(float(row['salary_to']))
+            year.append(DataSet.get_year(row['published_at']))
+            month.append(int(row['published_at'][5:7]))
+            currency.append(currency_codes.setdefault(row['salary_currency'], len(currency_codes)))
+            area.append(area_codes.setdefault(row['area_name'], len(area_codes)))
+        return VacancyColumns(names, np.frombuffer(salary_from, dtype=np.float64),
+                              np.frombuffer(salary_to, dtype=np.float64), np.frombuffer(year, dtype=np.int16),
+                              np.frombuffer(month, dtype=np.int8), np.frombuffer(currency, dtype=np.int8),
+                              list(currency_codes),
+                              np.frombuffer(area, dtype=np.int32), list(area_codes))
+
+    def get_cache_columns(self):
+        """Возвращает колонки для сохранения в ColumnsCache.
+
+        :return: dict: ключ - название атрибута, значение - массив NumPy или список строк
+        """
+        return {'names': self.names, 'salary_from': self.salary_from, 'salary_to': self.salary_to,
+                'year': self.year, 'month': self.month, 'currency': self.currency, 'currencies': self.currencies,
+                'area': self.area, 'areas': self.areas}
+
+    @staticmethod
+    def from_cache_columns(columns):
+        """Формирует колонки из словаря, загруженного ColumnsCache.load.
+
+        :param columns: словарь, полученный из get_cache_columns
+        :return: объект класса VacancyColumns
+        """
+        return VacancyColumns(**columns)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, index):
+        """Возвращает вакансию с указанным номером в виде объекта Vacancy.
+
+        :param index: номер вакансии
+        :return: объект класса Vacancy, у которого published_at - год публикации
+        """
+        vacancy = Vacancy([self.names[index], self.salary_from[index], self.salary_to[index],
+                           self.currencies[self.currency[index]], self.areas[self.area[index]], None])
+        vacancy.published_at = int(self.year[index])
+        return vacancy
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+    def get_salaries(self, currency_rates=None):
+        """Вычисляет среднюю зарплату в рублях для всех вакансий сразу, как InputConnect.get_right_course.
+
+        :param currency_rates: объект класса CurrencyRates для пересчета по курсу месяца публикации;
+            если None или курса за месяц нет, используется словарь currency_to_rub
+        :return: np.ndarray: массив зарплат (int64)
+        """
+        rates = np.array([currency_to_rub[currency] for currency in self.currencies], dtype=np.float64)[self.currency]
+        if currency_rates is not None:
+            keys = (self.currency.astype(np.int32) * 10000 + self.year) * 100 + self.month
+            unique_keys, inverse = np.unique(keys, return_inverse=True)
+            monthly_rates = np.empty(len(unique_keys), dtype=np.float64)
+            for i, key in enumerate(unique_keys.tolist()):
+                currency = self.currencies[key // 1000000]
+                rate = currency_rates.get_rate(currency, f"{key // 100 % 10000}-{key % 100:02d}")
+                monthly_rates[i] = currency_to_rub[currency] if rate is None else rate
+            rates = monthly_rates[inverse]
+        return ((self.salary_from * rates + self.salary_to * rates) / 2).astype(np.int64)
+
+    def get_profession_mask(self, profession):
+        """Отмечает вакансии, в названии которых встречается профессия.
+
+        :param profession: название профессии
+        :return: np.ndarray: булев массив
+        """
+        if self.name_index is not None:
+            return self.name_index.get_mask(profession)
+        return np.fromiter((profession in name for name in self.names), dtype=bool, count=len(self.names))
+
+    def get_profession_masks(self, professions):
+        """Отмечает вакансии сразу нескольких профессий за один проход по названиям (автомат Ахо — Корасик).
+
+        :param professions: названия профессий
+        :return: dict: ключ - профессия, значение - булев массив
+        """
+        if len(professions) == 1:
+            return {professions[0]: self.get_profession_mask(professions[0])}
+        return ProfessionMatcher(professions).get_masks(self.names)
+
 class InputConnect:
     """Отвечает за обработку параметров вводимых пользователем и формирует отчет."""
-    def __init__(self, input_file_name, input_profession_name):
+    def __init__(self, input_file_name, input_profession_name, currency_rates=None):
         """Инициализирует объект InputConnect.
 
         :param input_file_name: введенное пользователем имя файла
         :param input_profession_name: введенное пользователем название профессии
+        :param currency_rates: объект класса CurrencyRates для пересчета зарплат по курсу месяца публикации,
+            None - по курсам из словаря currency_to_rub
 
         >>> type(InputConnect('vacancies_by_year.csv', 'Программист')).__name__
         'InputConnect'
@@ -199,6 +398,7 @@ class InputConnect:
 
         self.file_name_init = input_file_name
         self.prof_name_init = input_profession_name
+        self.currency_rates = currency_rates
 
     def get_right_course(vacancy):
         """С помощью словаря currency_to_rub переводит зарплату в рубли и вычисляет среднюю зарплату.
@@ -375,22 +575,222 @@ class InputConnect:
             dict: Уровень зарплат по городам (в порядке убывания) - только первые 10 значений
             dict: Доля вакансий по городам (в порядке убывания) - только первые 10 значений
         """
-        data.general_count_vacancies_by_year = InputConnect.get_count_vacancies(data, "all")
-        data.general_salary_level_by_year = InputConnect.get_general_salary_level_by_year(data, "all")
+        statistics = VacancyStatistics.from_columns(data.columns, self.prof_name_init, self.currency_rates)
 
-        data.count_vacancies_by_profession = InputConnect.get_count_vacancies_by_profession(data, self.prof_name_init)
-        data.salary_level_by_profession = InputConnect.get_salary_level_by_profession(data, self.prof_name_init)
+        data.general_count_vacancies_by_year = statistics.get_count_vacancies()
+        data.general_salary_level_by_year = statistics.get_general_salary_level_by_year()
 
-        data.proportion_vacancy_by_cities = InputConnect.get_proportion_vacancy_by_cities(data)
-        data.salary_level_by_cities = InputConnect.get_salary_level_by_cities(data)
+        data.count_vacancies_by_profession = statistics.get_count_vacancies_by_profession()
+        data.salary_level_by_profession = statistics.get_salary_level_by_profession()
 
+        data.salary_level_by_cities = statistics.get_salary_level_by_cities()
         data.salary_level_by_cities_first_ten = dict(list(data.salary_level_by_cities.items())[:10])
 
-        data.proportion_vacancy_by_cities = InputConnect.get_right_proportion_vacancy_by_cities(data)
+        data.proportion_vacancy_by_cities = statistics.get_right_proportion_vacancy_by_cities()
         data.proportion_vacancy_by_cities_first_ten = dict(list(data.proportion_vacancy_by_cities.items())[:10])
 
         return data.general_salary_level_by_year, data.general_count_vacancies_by_year, data.salary_level_by_profession, data.count_vacancies_by_profession, data.salary_level_by_cities_first_ten, data.proportion_vacancy_by_cities_first_ten
 
+class VacancyStatistics:
+    """Накопители статистики по вакансиям, которые заполняются за один проход по данным.
+    Из накопителей получаются те же словари, что и у методов InputConnect.
+
+    Attributes:
+        profession (str): название профессии
+        count_vacancies (int): общее количество вакансий
+        count_by_year (dict): количество вакансий по годам
+        salary_by_year (dict): сумма зарплат по годам
+        count_by_profession (dict): количество вакансий выбранной профессии по годам
+        salary_by_profession (dict): сумма зарплат выбранной профессии по годам
+        count_by_cities (dict): количество вакансий по городам
+        salary_by_cities (dict): сумма зарплат по городам
+    """
+    def __init__(self, profession):
+        """Инициализирует пустые накопители.
+
+        :param profession: название профессии
+        """
+        self.profession = profession
+        self.count_vacancies = 0
+        self.count_by_year = dict()
+        self.salary_by_year = dict()
+        self.count_by_profession = dict()
+        self.salary_by_profession = dict()
+        self.count_by_cities = dict()
+        self.salary_by_cities = dict()
+
+    @staticmethod
+    def from_vacancies(vacancies, profession):
+        """Заполняет накопители за один проход по вакансиям.
+
+        :param vacancies: итерируемый объект с объектами класса Vacancy (список или DataSet.iter_vacancies)
+        :param profession: название профессии
+        :return: объект класса VacancyStatistics
+        """
+        statistics = VacancyStatistics(profession)
+        for vacancy in vacancies:
+            statistics.add(vacancy)
+        return statistics
+
+    @staticmethod
+    def from_columns(columns, profession, currency_rates=None):
+        """Заполняет накопители векторными операциями над колонками, без объектов Vacancy.
+        Порядок ключей в словарях совпадает с порядком первого появления в файле, как при обходе вакансий.
+
+        :param columns: объект класса VacancyColumns
+        :param profession: название профессии
+        :param currency_rates: объект класса CurrencyRates для пересчета по курсу месяца публикации
+        :return: объект класса VacancyStatistics
+        """
+        return VacancyStatistics.from_columns_batch(columns, [profession], currency_rates)[profession]
+
+    @staticmethod
+    def from_columns_batch(columns, professions, currency_rates=None):
+        """Заполняет накопители для нескольких профессий сразу: зарплаты, статистика по годам и по городам
+        считаются один раз, а названия сравниваются со всеми профессиями за один проход.
+
+        :param columns: объект класса VacancyColumns
+        :param professions: названия профессий
+        :param currency_rates: объект класса CurrencyRates для пересчета по курсу месяца публикации
+        :return: dict: ключ - профессия, значение - объект класса VacancyStatistics
+        """
+        salaries = columns.get_salaries(currency_rates)
+        count_by_year, salary_by_year = VacancyStatistics.group_by_year(columns.year, salaries)
+        counts = np.bincount(columns.area, minlength=len(columns.areas))
+        sums = np.zeros(len(columns.areas), dtype=np.int64)
+        np.add.at(sums, columns.area, salaries)
+        count_by_cities = {area: int(counts[code]) for code, area in enumerate(columns.areas)}
+        salary_by_cities = {area: int(sums[code]) for code, area in enumerate(columns.areas)}
+        result = dict()
+        for profession, mask in columns.get_profession_masks(professions).items():
+            statistics = VacancyStatistics(profession)
+            statistics.count_vacancies = len(columns)
+            statistics.count_by_year, statistics.salary_by_year = dict(count_by_year), dict(salary_by_year)
+            statistics.count_by_profession, statistics.salary_by_profession = VacancyStatistics.group_by_year(
+                columns.year[mask], salaries[mask])
+            statistics.count_by_cities, statistics.salary_by_cities = dict(count_by_cities), dict(salary_by_cities)
+            result[profession] = statistics
+        return result
+
+    @staticmethod
+    def group_by_year(years, salaries):
+        """Считает количество вакансий и сумму зарплат по годам.
+
+        :param years: массив годов
+        :param salaries: массив зарплат той же длины
+        :return: словарь с количеством и словарь с суммой зарплат, годы в порядке первого появления
+        """
+        unique_years, first_index, inverse = np.unique(years, return_index=True, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(unique_years))
+        sums = np.zeros(len(unique_years), dtype=np.int64)
+        np.add.at(sums, inverse, salaries)
+        order = np.argsort(first_index, kind='stable')
+        return ({int(unique_years[i]): int(counts[i]) for i in order},
+                {int(unique_years[i]): int(sums[i]) for i in order})
+
+    def add(self, vacancy):
+        """Добавляет вакансию во все накопители.
+
+        :param vacancy: объект класса Vacancy
+        """
+        salary = InputConnect.get_right_course(vacancy)
+        year = vacancy.published_at
+        self.count_vacancies += 1
+        self.count_by_year[year] = self.count_by_year.get(year, 0) + 1
+        self.salary_by_year[year] = self.salary_by_year.get(year, 0) + salary
+        if self.profession in vacancy.name:
+            self.count_by_profession[year] = self.count_by_profession.get(year, 0) + 1
+            self.salary_by_profession[year] = self.salary_by_profession.get(year, 0) + salary
+        self.count_by_cities[vacancy.area_name] = self.count_by_cities.get(vacancy.area_name, 0) + 1
+        self.salary_by_cities[vacancy.area_name] = self.salary_by_cities.get(vacancy.area_name, 0) + salary
+
+    def merge(self, other):
+        """Добавляет накопители другого объекта (например, посчитанного по другой части файла).
+
+        :param other: объект класса VacancyStatistics для той же профессии
+        :return: этот же объект
+        """
+        self.count_vacancies += other.count_vacancies
+        for accumulator, other_accumulator in ((self.count_by_year, other.count_by_year),
+                                               (self.salary_by_year, other.salary_by_year),
+                                               (self.count_by_profession, other.count_by_profession),
+                                               (self.salary_by_profession, other.salary_by_profession),
+                                               (self.count_by_cities, other.count_by_cities),
+                                               (self.salary_by_cities, other.salary_by_cities)):
+            for key, value in other_accumulator.items():
+                accumulator[key] = accumulator.get(key, 0) + value
+        return self
+
+    def get_report(self):
+        """Возвращает словари для отчета в том же порядке, что и InputConnect.print.
+
+        :return: tuple: шесть словарей со статистикой по годам и по городам (по городам - только первые 10 значений)
+        """
+        return (self.get_general_salary_level_by_year(), self.get_count_vacancies(),
+                self.get_salary_level_by_profession(), self.get_count_vacancies_by_profession(),
+                dict(list(self.get_salary_level_by_cities().items())[:10]),
+                dict(list(self.get_right_proportion_vacancy_by_cities().items())[:10]))
+
+    def get_count_vacancies(self):
+        """Количество всех вакансий по годам, как у InputConnect.get_count_vacancies.
+
+        :return: dict: словарь, где ключ - год, значение - количество вакансий
+        """
+        if len(self.count_by_year) == 0:
+            return {2022: 0}
+        return dict(self.count_by_year)
+
+    def get_general_salary_level_by_year(self):
+        """Средняя зарплата всех вакансий по годам, как у InputConnect.get_general_salary_level_by_year.
+
+        :return: dict: словарь, где ключ - год, значение - средняя зарплата
+        """
+        if len(self.salary_by_year) == 0:
+            return {2022: 0}
+        return {year: math.floor(salary / self.count_by_year[year]) for year, salary in self.salary_by_year.items()}
+
+    def get_count_vacancies_by_profession(self):
+        """Количество вакансий выбранной профессии по годам, как у InputConnect.get_count_vacancies_by_profession.
+
+        :return: dict: словарь, где ключ - год, значение - количество вакансий
+        """
+        if len(self.count_by_profession) == 0:
+            return {2022: 0}
+        return dict(self.count_by_profession)
+
+    def get_salary_level_by_profession(self):
+        """Средняя зарплата выбранной профессии по годам, как у InputConnect.get_salary_level_by_profession.
+
+        :return: dict: словарь, где ключ - год, значение - средняя зарплата
+        """
+        if len(self.salary_by_profession) == 0:
+            return {2022: 0}
+        if self.profession == "all":
+            return dict(self.salary_by_profession)
+        return {year: math.floor(salary / self.count_by_profession[year])
+                for year, salary in self.salary_by_profession.items()}
+
+    def get_salary_level_by_cities(self):
+        """Средняя зарплата в городах, где не меньше 1% вакансий, по убыванию,
+        как у InputConnect.get_salary_level_by_cities.
+
+        :return: dict: словарь, где ключ - город, значение - средняя зарплата
+        """
+        salary_level_by_cities = {city: math.floor(self.salary_by_cities[city] / count)
+                                  for city, count in self.count_by_cities.items()
+                                  if math.floor(count / self.count_vacancies * 100) >= 1}
+        return {k: v for k, v in sorted(salary_level_by_cities.items(), key=lambda item: item[1], reverse=True)}
+
+    def get_right_proportion_vacancy_by_cities(self):
+        """Доля вакансий в городах, где не меньше 1% вакансий, по убыванию,
+        как у InputConnect.get_right_proportion_vacancy_by_cities.
+
+        :return: dict: словарь, где ключ - город, значение - доля вакансий
+        """
+        proportion_vacancy_by_cities = {k: round(v / self.count_vacancies, 4) for k, v in self.count_by_cities.items()}
+        proportion_vacancy_by_cities = {k: v for k, v in proportion_vacancy_by_cities.items() if v * 100 >= 1}
+        return {k: v for k, v in sorted(proportion_vacancy_by_cities.items(), key=lambda item: item[1], reverse=True)}
+
 class Report(InputConnect):
     """Класс для формирования отчетности: Excel-таблицы, графиков и общего отчета в виде pdf-файла.
 
@@ -425,9 +825,11 @@ class Report(InputConnect):
             return ""
         return str(val)
 
-    def generate_excel(self):
+    def generate_excel(self, file_name='report.xlsx'):
         """Генерирует отчет в виде excel-файла.
             На первом листе отображается статистика по годам, на втором листе - статистика по городам.
+
+        :param file_name: название excel-файла
         """
         wb = Workbook()
         sheet1 = wb.active
@@ -485,10 +887,12 @@ class Report(InputConnect):
             sheet2[f'D{i}'].border = border
             sheet2[f'E{i}'].border = border
 
-        wb.save('report.xlsx')
+        wb.save(file_name)
 
-    def generate_image(self):
+    def generate_image(self, file_name='graph.png'):
         """Генерирует отчет в виде изображения с графиками, сохраняя его в .png файл.
+
+        :param file_name: название .png файла
         """
         fig = plt.figure()
 
@@ -534,7 +938,7 @@ class Report(InputConnect):
         ax_4.axis('equal')
 
         plt.tight_layout()
-        plt.savefig('graph.png')
+        plt.savefig(file_name)
 
     def generate_pdf(self):
         """Генерирует отчет с графиками и таблицами в виде .pdf файла."""
@@ -566,35 +970,67 @@ class Report(InputConnect):
 
 if __name__ == '__main__':
     input_file_name = input("Введите название файла: ")
-    input_profession_name = input("Введите название профессии: ")
+    input_profession_name = input("Введите название профессии (несколько профессий - через ';'): ")
     user_input = input("Статистика или вакансии? ").lower()
+    historical_rates = input("Пересчитать зарплаты по курсу месяца публикации? (да/нет) ").lower() == 'да'
+    currency_rates = (CurrencyRates.from_csv('currency_2003-2022.csv')
+                      if historical_rates and not input_file_name.endswith(('.db', '.npz')) else None)
+    professions = [profession.strip() for profession in input_profession_name.split(';')]
     profile = cProfile.Profile()
     profile.enable()
-    dataset_vacancies = DataSet.get_dataset(file_name=input_file_name)
-    InputConnect.print(InputConnect(input_file_name=input_file_name, input_profession_name=input_profession_name),
-                       dataset_vacancies)
-
-    dicts = InputConnect.print(InputConnect(input_file_name=input_file_name, input_profession_name=input_profession_name),
-                               dataset_vacancies)
-
-    general_salary_level_by_year = dicts[0]
-    general_count_vacancies_by_year = dicts[1]
-    salary_level_by_profession = dicts[2]
-    count_vacancies_by_profession = dicts[3]
-    salary_level_by_cities_first_ten = dicts[4]
-    proportion_vacancy_by_cities_first_ten = dicts[5]
-
-    report = Report(dict1=general_salary_level_by_year, dict2=general_count_vacancies_by_year,
-                                 dict3=salary_level_by_profession, dict4=count_vacancies_by_profession,
-                                 dict5=salary_level_by_cities_first_ten, dict6=proportion_vacancy_by_cities_first_ten)
-
-    if user_input == 'вакансии':
-        Report.generate_image(report)
-    elif user_input == 'статистика':
-        Report.generate_excel(report)
+    if input_file_name.endswith('.db') and historical_rates:
+        print("В базе SQLite зарплаты уже переведены в рубли по фиксированному курсу, "
+              "пересчет по курсу месяца публикации для нее недоступен")
+        exit(0)
+    if input_file_name.endswith('.db'):
+        from vacancies_db import VacanciesDB
+        database = VacanciesDB(input_file_name)
+        if database.is_converted():
+            print("База SQLite загружена из файлов после convert_currencies(3.4.1).py, для статистики нужна база "
+                  "из исходных файлов с salary_from, salary_to и salary_currency")
+            exit(0)
+        reports = {profession: database.get_statistics(profession).get_report() for profession in professions}
+    elif input_file_name.endswith('.npz'):
+        from vacancy_cube import VacancyCube
+        cube = VacancyCube.load(input_file_name)
+        if cube.converted:
+            print("Куб построен по файлу после convert_currencies(3.4.1).py, для статистики нужен куб "
+                  "по исходному файлу с salary_from, salary_to и salary_currency")
+            exit(0)
+        if cube.historical_rates != historical_rates:
+            print(f"Куб построен {'с пересчетом' if cube.historical_rates else 'без пересчета'} зарплат по курсу "
+                  f"месяца публикации, ответ на вопрос о пересчете должен быть '{'да' if cube.historical_rates else 'нет'}'")
+            exit(0)
+        reports = {profession: cube.get_statistics(profession).get_report() for profession in professions}
+    elif len(professions) == 1:
+        dataset_vacancies = DataSet.get_dataset(file_name=input_file_name, use_cache=True)
+        dataset_vacancies.use_name_index()
+        reports = {input_profession_name: InputConnect.print(InputConnect(input_file_name=input_file_name,
+                                                                          input_profession_name=input_profession_name,
+                                                                          currency_rates=currency_rates), dataset_vacancies)}
+    else:
+        dataset_vacancies = DataSet.get_dataset(file_name=input_file_name, use_cache=True)
+        reports = {profession: statistics.get_report() for profession, statistics in
+                   VacancyStatistics.from_columns_batch(dataset_vacancies.columns, professions, currency_rates).items()}
+    if currency_rates is not None:
+        print(f"Курсы валют: найдено в кэше {currency_rates.hits}, в таблице {currency_rates.misses}")
+
+    for input_profession_name, dicts in reports.items():
+        general_salary_level_by_year = dicts[0]
+        general_count_vacancies_by_year = dicts[1]
+        salary_level_by_profession = dicts[2]
+        count_vacancies_by_profession = dicts[3]
+        salary_level_by_cities_first_ten = dicts[4]
+        proportion_vacancy_by_cities_first_ten = dicts[5]
+
+        report = Report(dict1=general_salary_level_by_year, dict2=general_count_vacancies_by_year,
+                                     dict3=salary_level_by_profession, dict4=count_vacancies_by_profession,
+                                     dict5=salary_level_by_cities_first_ten, dict6=proportion_vacancy_by_cities_first_ten)
+        suffix = '' if len(reports) == 1 else f' {input_profession_name}'
+
+        if user_input == 'вакансии':
+            Report.generate_image(report, f'graph{suffix}.png')
+        elif user_input == 'статистика':
+            Report.generate_excel(report, f'report{suffix}.xlsx')
     profile.disable()
     profile.print_stats(1)
-
-
-
-
@@ -1,8 +1,12 @@
 import cProfile
 from _datetime import datetime
 import multiprocessing
-import pandas as pd
 import os
+import sys
+
+from executors import Executor
+from shared_arrays import SharedArray
+from vacancy_shards import Shards, YearPartials, read_vacancies
 
 class DataSet:
     """Класс для получения данных из CSV файла.
@@ -39,6 +43,59 @@ class DataSet:
             name = os.listdir(self.file_name)
             self.data = p.map(self.get_data_file, name)
 
+    def get_shards_multiproc(self, shard_size=None):
+        """Обрабатывает данные частями примерно одинакового размера, используя многопроцессорность.
+
+        :param shard_size: размер части в байтах, по умолчанию - около четырех частей на процесс
+        """
+        self.get_analytics('process', shard_size=shard_size)
+
+    def get_analytics(self, backend='process', workers=None, shard_size=None, shared_memory=False, chunksize=None):
+        """Обрабатывает данные частями примерно одинакового размера выбранным способом выполнения.
+        Каждая часть дает частичные накопители по годам и по городам, которые затем объединяются,
+        поэтому крупные года не задерживают остальные потоки и процессы.
+
+        :param backend: способ выполнения из Executor.backends (serial, thread, process, imap_unordered, asyncio)
+        :param workers: количество потоков или процессов, по умолчанию - количество ядер
+        :param shard_size: размер части в байтах, по умолчанию - около четырех частей на поток или процесс
+        :param shared_memory: возвращать накопители частей массивами в разделяемой памяти, а не через pickle
+        :param chunksize: количество частей, передаваемых процессу за один раз, по умолчанию - Executor.get_chunksize
+        """
+        executor = Executor(backend, workers, chunksize)
+        shard_size = shard_size or Shards.get_shard_size(self.file_name, executor.workers * 4)
+        shards = Shards.get_shards(self.file_name, shard_size)
+        if shared_memory:
+            SharedArray.prepare()
+            partials = (YearPartials.from_array(SharedArray.receive(descriptor), self.profession,
+                                                areas, SharedArray.receive(city_descriptor), shard[:2])
+                        for shard, descriptor, areas, city_descriptor in executor.map(self.get_data_shard_shared, shards))
+        else:
+            partials = executor.map(self.get_data_shard, shards)
+        result = YearPartials(self.profession)
+        for partial in partials:
+            result.merge(partial)
+        self.data = result.get_rows()
+        self.cities = result.get_cities()
+
+    def get_data_shard(self, shard):
+        """Возвращает частичные накопители по годам и по городам для части файла.
+
+        :param shard: часть (название файла, начало, конец)
+        :return: объект класса YearPartials
+        """
+        return YearPartials.from_shard(shard, self.profession)
+
+    def get_data_shard_shared(self, shard):
+        """Возвращает частичные накопители по годам и по городам для части файла через разделяемую память.
+
+        :param shard: часть (название файла, начало, конец)
+        :return: часть, описание массива YearPartials.to_array, названия городов
+            и описание массива YearPartials.get_city_array для SharedArray.receive
+        """
+        partials = YearPartials.from_shard(shard, self.profession)
+        return (shard, SharedArray.send(partials.to_array()), list(partials.cities),
+                SharedArray.send(partials.get_city_array()))
+
     def get_data_file(self, file_name):
         """Возвращает данные файла
 		Attributes:
@@ -51,14 +108,14 @@ class DataSet:
 		        mid_prof_salary (int): средняя зп выбранной профессии
 			    count_vacanies_by_prof (int): количество вакансий выбранной профессии
         """
-        file = pd.read_csv(f'{self.file_name}/{file_name}')
-        data = file[file['name'].str.contains(self.profession)]
-        years = file['published_at'].apply(lambda x: x[:4]).unique()
-        year = years[0]
-        mid_salary = round(file.apply(lambda x: (x['salary_from'] + x['salary_to']) * 0.5, axis=1).mean())
+        file = read_vacancies(f'{self.file_name}/{file_name}')
+        salary = (file['salary_from'] + file['salary_to']) * 0.5
+        mask = file['name'].str.contains(self.profession, na=False).to_numpy()
+        year = file['published_at'].iloc[0][:4]
+        mid_salary = round(salary.mean())
         count_vacanies = file.shape[0]
-        mid_prof_salary = round(data.apply(lambda x: (x['salary_from'] + x['salary_to']) * 0.5, axis=1).mean())
-        count_vacanies_by_prof = data.shape[0]
+        mid_prof_salary = round(salary[mask].mean())
+        count_vacanies_by_prof = int(mask.sum())
         return year, mid_salary, count_vacanies, mid_prof_salary, count_vacanies_by_prof
 
     def get_data_dict(self):
@@ -85,12 +142,16 @@ class DataSet:
         print("Динамика количества вакансий по годам:", dict2)
         print("Динамика уровня зарплат по годам для выбранной профессии:", dict3)
         print("Динамика количества вакансий по годам для выбранной профессии:", dict4)
+        if hasattr(self, 'cities'):
+            dict5, dict6 = self.cities
+            print("Уровень зарплат по городам (в порядке убывания):", dict5)
+            print("Доля вакансий по городам (в порядке убывания):", dict6)
 
 if __name__ == '__main__':
     profile = cProfile.Profile()
     profile.enable()
     data_analitics = DataSet()
-    data_analitics.get_multiproc()
+    data_analitics.get_analytics(sys.argv[1] if len(sys.argv) > 1 else 'process')
     data_analitics.print()
     profile.disable()
     profile.print_stats(1)
\ No newline at end of file
@@ -0,0 +1,252 @@
+import os
+import re
+from array import array
+from collections import deque
+
+import numpy as np
+
+
+class NameIndex:
+    """Триграммный индекс по названиям вакансий для быстрого поиска профессии.
+
+    Для каждой тройки символов названия (после casefold) хранится отсортированный список номеров вакансий.
+    Запрос пересекает списки троек профессии, а найденных кандидатов проверяет тем же условием,
+    что и исходный код: profession in name (main.py) или str.contains(profession, case=False) (3.4.2.py),
+    поэтому результат совпадает с полным перебором.
+
+    Attributes:
+        names (list): названия вакансий, номера в индексе - индексы в этом списке
+        grams (np.ndarray): отсортированные тройки символов
+        offsets (np.ndarray): границы списков номеров в ids для каждой тройки
+        ids (np.ndarray): номера вакансий (int32)
+    """
+    def __init__(self, names, grams, offsets, ids):
+        """Инициализирует объект NameIndex.
+        """
+        self.names = names
+        self.grams = grams
+        self.offsets = offsets
+        self.ids = ids
+
+    @staticmethod
+    def get_grams(text):
+        """Возвращает множество троек символов строки.
+
+        :param text: строка
+        :return: set: тройки символов
+        """
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    @staticmethod
+    def build(names):
+        """Строит индекс по списку названий.
+
+        :param names: названия вакансий
+        :return: объект класса NameIndex
+        """
+        postings = dict()
+        for row, name in enumerate(names):
+            for gram in NameIndex.get_grams(name.casefold()):
+                postings.setdefault(gram, array('i')).append(row)
+        grams = sorted(postings)
+        offsets = np.zeros(len(grams) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[gram]) for gram in grams])
+        ids = np.zeros(offsets[-1], dtype=np.int32)
+        for i, gram in enumerate(grams):
+            ids[offsets[i]:offsets[i + 1]] = np.frombuffer(postings[gram], dtype=np.int32)
+        return NameIndex(names, np.array(grams, dtype='<U3'), offsets, ids)
+
+    def save(self, file_name, source_file_name=None):
+        """Сохраняет индекс в файл .npz.
+
+        :param file_name: название файла индекса
+        :param source_file_name: CSV-файл, по которому построен индекс (запоминаются его размер и время изменения)
+        """
+        np.savez(file_name, grams=self.grams, offsets=self.offsets, ids=self.ids,
+                 source=NameIndex.get_source_key(source_file_name, self.names))
+
+    @staticmethod
+    def get_source_key(source_file_name, names):
+        """Возвращает размер и время изменения CSV-файла и количество названий, по которым проверяется актуальность индекса.
+
+        :param source_file_name: CSV-файл или None
+        :param names: названия вакансий
+        :return: np.ndarray: ключ (int64)
+        """
+        stat = os.stat(source_file_name) if source_file_name else None
+        return np.array([stat.st_size if stat else -1, stat.st_mtime_ns if stat else -1, len(names)], dtype=np.int64)
+
+    @staticmethod
+    def load(file_name, names, source_file_name=None):
+        """Загружает индекс из файла .npz.
+
+        :param file_name: название файла индекса
+        :param names: названия вакансий, по которым построен индекс
+        :param source_file_name: CSV-файл, по которому построен индекс
+        :return: объект класса NameIndex или None, если файла нет или CSV-файл изменился после построения индекса
+        """
+        if not os.path.exists(file_name):
+            return None
+        with np.load(file_name) as data:
+            if not np.array_equal(data['source'], NameIndex.get_source_key(source_file_name, names)):
+                return None
+            return NameIndex(names, data['grams'], data['offsets'], data['ids'])
+
+    @staticmethod
+    def load_or_build(source_file_name, names):
+        """Загружает индекс, сохраненный рядом с CSV-файлом, или строит и сохраняет новый.
+
+        :param source_file_name: CSV-файл с вакансиями
+        :param names: названия вакансий из этого файла
+        :return: объект класса NameIndex
+        """
+        file_name = f"{source_file_name}.names.npz"
+        index = NameIndex.load(file_name, names, source_file_name)
+        if index is None:
+            index = NameIndex.build(names)
+            index.save(file_name, source_file_name)
+        return index
+
+    def get_posting(self, gram):
+        """Возвращает номера вакансий, в названии которых есть тройка символов.
+
+        :param gram: тройка символов
+        :return: np.ndarray: отсортированные номера вакансий
+        """
+        position = np.searchsorted(self.grams, gram)
+        if position == len(self.grams) or self.grams[position] != gram:
+            return np.zeros(0, dtype=np.int32)
+        return self.ids[self.offsets[position]:self.offsets[position + 1]]
+
+    def get_candidates(self, text):
+        """Возвращает номера вакансий, в названии которых есть все тройки символов строки.
+
+        :param text: строка после casefold
+        :return: np.ndarray: номера вакансий или None, если строка короче трех символов
+        """
+        grams = NameIndex.get_grams(text)
+        if not grams:
+            return None
+        postings = sorted((self.get_posting(gram) for gram in grams), key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if len(candidates) == 0:
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        return candidates
+
+    def query(self, profession, case=True):
+        """Находит вакансии, в названии которых встречается профессия.
+
+        :param profession: название профессии
+        :param case: True - с учетом регистра (profession in name), False - как str.contains(profession, case=False)
+        :return: np.ndarray: отсортированные номера вакансий
+        """
+        if case:
+            candidates = self.get_candidates(profession.casefold())
+            match = lambda name: profession in name
+        else:
+            pattern = re.compile(profession, re.IGNORECASE)
+            literal = re.search(r'[.^$*+?{}\[\]\\|()]', profession) is None
+            candidates = self.get_candidates(profession.casefold()) if literal else None
+            match = lambda name: pattern.search(name) is not None
+        if candidates is None:
+            candidates = range(len(self.names))
+        return np.array([row for row in candidates if match(self.names[row])], dtype=np.int32)
+
+    def get_mask(self, profession, case=True):
+        """Отмечает вакансии, в названии которых встречается профессия.
+
+        :param profession: название профессии
+        :param case: учитывать ли регистр, как в query
+        :return: np.ndarray: булев массив длины len(names)
+        """
+        mask = np.zeros(len(self.names), dtype=bool)
+        mask[self.query(profession, case)] = True
+        return mask
+
+
+class ProfessionMatcher:
+    """Автомат Ахо — Корасик для поиска сразу нескольких профессий в названиях вакансий за один проход по строке.
+
+    Профессии, для которых нельзя искать подстроку (пустые, а без учета регистра - содержащие спецсимволы
+    регулярных выражений, как у str.contains), проверяются отдельно регулярным выражением.
+
+    Attributes:
+        professions (list): названия профессий, номер профессии - индекс в этом списке
+        case (bool): учитывать ли регистр
+        goto (list): переходы автомата, для каждого состояния - словарь символ -> состояние
+        fail (list): суффиксные ссылки состояний
+        output (list): номера профессий, которые заканчиваются в состоянии (с учетом суффиксных ссылок)
+        patterns (list): пары (номер профессии, регулярное выражение) для проверки отдельно от автомата
+    """
+    def __init__(self, professions, case=True):
+        """Строит автомат по списку профессий.
+
+        :param professions: названия профессий
+        :param case: True - с учетом регистра (profession in name), False - как str.contains(profession, case=False)
+        """
+        self.professions = list(professions)
+        self.case = case
+        self.goto = [dict()]
+        self.fail = [0]
+        self.output = [[]]
+        self.patterns = []
+        for number, profession in enumerate(self.professions):
+            if not profession or not case and re.search(r'[.^$*+?{}\[\]\\|()]', profession):
+                self.patterns.append((number, re.compile(profession if not case else re.escape(profession),
+                                                         0 if case else re.IGNORECASE)))
+                continue
+            state = 0
+            for char in profession if case else profession.lower():
+                if char not in self.goto[state]:
+                    self.goto.append(dict())
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].append(number)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail = self.fail[state]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[next_state] = self.goto[fail].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def match(self, name):
+        """Находит профессии, которые встречаются в названии.
+
+        :param name: название вакансии
+        :return: set: номера профессий
+        """
+        found = set()
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for char in name if self.case else name.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        for number, pattern in self.patterns:
+            if pattern.search(name):
+                found.add(number)
+        return found
+
+    def get_masks(self, names):
+        """Отмечает вакансии каждой профессии. Каждое различное название проверяется автоматом один раз.
+
+        :param names: названия вакансий
+        :return: dict: ключ - профессия, значение - булев массив длины len(names)
+        """
+        masks = np.zeros((len(self.professions), len(names)), dtype=bool)
+        matches = dict()
+        for row, name in enumerate(names):
+            if name not in matches:
+                matches[name] = list(self.match(name))
+            masks[matches[name], row] = True
+        return {profession: masks[number] for number, profession in enumerate(self.professions)}
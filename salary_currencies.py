@@ -1,9 +1,114 @@
+import asyncio
+import os
+import sys
 import pandas as pd
 import numpy as np
-import grequests
+import aiohttp
 from datetime import datetime
 from xml.etree import ElementTree
 
+from currency_rates import CurrencyRates
+
+
+class RatesFetcher:
+    """Асинхронно загружает ежедневные курсы ЦБ РФ (XML_daily) с ограничением количества одновременных запросов,
+    повторами при ошибках и кэшем ответов на диске.
+
+    Attributes:
+        url (str): адрес XML_daily.asp
+        cache_dir (str): папка для кэша, один файл на дату
+        limit (int): максимальное количество одновременных запросов
+        retries (int): количество повторов запроса при ошибке
+        backoff (float): пауза перед первым повтором в секундах, дальше удваивается
+        requests_count (int): количество отправленных запросов
+    """
+    retry_statuses = {429}
+
+    def __init__(self, url="http://www.cbr.ru/scripts/XML_daily.asp", cache_dir="cbr_cache", limit=10, retries=3,
+                 backoff=0.5):
+        """Инициализирует объект RatesFetcher.
+        """
+        self.url = url
+        self.cache_dir = cache_dir
+        self.limit = limit
+        self.retries = retries
+        self.backoff = backoff
+        self.requests_count = 0
+
+    def get_cache_path(self, date):
+        """Возвращает путь к файлу кэша для даты.
+
+        :param date: дата
+        :return: str: путь к файлу
+        """
+        return os.path.join(self.cache_dir, f"{date.strftime('%Y-%m-%d')}.xml")
+
+    async def fetch(self, session, semaphore, date):
+        """Возвращает ответ ЦБ РФ за дату: из кэша, а если его нет - с сайта, с повторами при ошибках соединения,
+        ответах 5xx и 429. Остальные ошибки 4xx сразу пробрасываются.
+
+        :param session: сессия aiohttp
+        :param semaphore: семафор, ограничивающий количество одновременных запросов
+        :param date: дата
+        :return: bytes: XML с курсами валют
+        """
+        path = self.get_cache_path(date)
+        if os.path.exists(path):
+            with open(path, mode='rb') as file:
+                return file.read()
+        url = f"{self.url}?date_req={date.strftime('%d/%m/%Y')}"
+        for attempt in range(self.retries + 1):
+            try:
+                async with semaphore:
+                    self.requests_count += 1
+                    async with session.get(url) as response:
+                        response.raise_for_status()
+                        content = await response.read()
+                break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                if attempt == self.retries or (isinstance(error, aiohttp.ClientResponseError) and error.status < 500
+                                               and error.status not in RatesFetcher.retry_statuses):
+                    raise
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(f"{path}.tmp", mode='wb') as file:
+            file.write(content)
+        os.replace(f"{path}.tmp", path)
+        return content
+
+    async def fetch_all(self, dates):
+        """Загружает ответы за все даты одновременно, но не больше limit запросов за раз.
+
+        :param dates: список дат
+        :return: list: ответы в порядке дат
+        """
+        semaphore = asyncio.Semaphore(self.limit)
+        async with aiohttp.ClientSession() as session:
+            return await asyncio.gather(*(self.fetch(session, semaphore, date) for date in dates))
+
+    def get_responses(self, dates):
+        """Синхронная обертка над fetch_all.
+
+        :param dates: список дат
+        :return: list: ответы в порядке дат
+        """
+        return asyncio.run(self.fetch_all(dates))
+
+    @staticmethod
+    def parse_rates(content, titles):
+        """Достает из ответа ЦБ РФ курсы к рублю за одну единицу выбранных валют.
+
+        :param content: XML с курсами валют
+        :param titles: названия валют
+        :return: dict: словарь, где ключ - валюта, значение - курс
+        """
+        data = {}
+        for element in ElementTree.fromstring(content).iter('Valute'):
+            currency = element.findtext('CharCode')
+            if currency in titles:
+                data[currency] = round(float(element.findtext('Value').replace(',', '.')) / int(element.findtext('Nominal')), 6)
+        return data
+
 class Currency:
     """Класс для формирования CSV-файла с курсами валют.
 
@@ -12,11 +117,15 @@ class Currency:
         data (str): строки csv-файла
     """
 
-    def __init__(self, data):
+    def __init__(self, data, fetcher=None):
         """Инициализирует объект Currency.
+
+        :param data: DataFrame с вакансиями
+        :param fetcher: объект класса RatesFetcher для загрузки курсов
         """
         self.file_name = "vacancies_dif_currencies.csv"
         self.data = data[pd.notnull(data['salary_currency'])]
+        self.fetcher = RatesFetcher() if fetcher is None else fetcher
 
     def get_most_common_currency(self):
         """Создает список валют, которые не являются рублями и встречаются в более чем в 5000 вакансий
@@ -35,19 +144,20 @@ class Currency:
         df = pd.read_csv(self.file_name)
         print(df["salary_currency"].value_counts())
 
-    def get_urls(self, list_dates, dict_for_csv):
+    @staticmethod
+    def get_dates(list_dates, dict_for_csv):
         """
-        Создает список urls
+        Создает список дат для запросов курсов и заполняет месяцы в словаре с данными
         :param list_dates: Список с датами
         :param dict_for_csv: Словарь с данными
-        :return: list: Список urls
+        :return: list: Список дат
         """
-        urls = []
+        dates = []
         for date in list_dates:
             d = pd.to_datetime(str(date))
             dict_for_csv["dat"].append(d.strftime('%Y-%m'))
-            urls.append(rf"http://www.cbr.ru/scripts/XML_daily.asp?date_req={d.strftime('%d/%m/%Y')}")
-        return urls
+            dates.append(d)
+        return dates
 
     def get_data_for_csv(self):
         """Отбирает данные для создания CSV-файла.
@@ -65,32 +175,69 @@ class Currency:
         list_dates = pd.date_range(from_date.strftime("%Y-%m"), to_date.strftime("%Y-%m"), freq="MS")
         return titles, dict_for_csv, list_dates
 
-    def make_csv(self):
-        """Создает DataFrame с информацией о валютах и сохраняет в CSV-файл.
+    @staticmethod
+    def get_rates(fetcher, titles, dict_for_csv, list_dates):
+        """Загружает курсы валют на первое число каждого месяца.
+
+        :param fetcher: объект класса RatesFetcher
+        :param titles: список названий валют
+        :param dict_for_csv: словарь для сбора данных
+        :param list_dates: список с датами
+        :return: CurrencyRates: курсы валют по месяцам
         """
-        titles, dict_for_csv, list_dates = self.get_data_for_csv()
-        urls = self.get_urls(list_dates, dict_for_csv)
-        for response in grequests.map((grequests.get(url) for url in urls)):
-            data = {}
-            root = ElementTree.fromstring(response.content)
-            for element in root.iter('Valute'):
-                data_currency = []
-                for child in element:
-                    data_currency.append(child.text)
-                if data_currency[1] in titles:
-                    data[data_currency[1]] = round(float(data_currency[4].replace(',', '.')) / int(data_currency[2]), 6)
+        dates = Currency.get_dates(list_dates, dict_for_csv)
+        for content in fetcher.get_responses(dates):
+            data = RatesFetcher.parse_rates(content, titles)
             for key in titles:
                 if key in data:
                     dict_for_csv[key].append(data[key])
                 else:
                     dict_for_csv[key].append(None)
+        rates = np.array([dict_for_csv[key] for key in titles], dtype=np.float64).T
+        return CurrencyRates(dict_for_csv["dat"], titles, rates)
 
-        dataFrame = pd.DataFrame(dict_for_csv)
-        dataFrame.to_csv("currency_2003-2022.csv", index=False, encoding='utf-8-sig')
+    def make_csv(self):
+        """Создает DataFrame с информацией о валютах и сохраняет в CSV-файл.
+        """
+        titles, dict_for_csv, list_dates = self.get_data_for_csv()
+        Currency.get_rates(self.fetcher, titles, dict_for_csv, list_dates).to_csv("currency_2003-2022.csv")
         self.print_frequency_currency()
 
+    @staticmethod
+    def update_rates(csv_file_name="currency_2003-2022.csv", db_file_name="currency_2003-2022.db",
+                     table_name="currency_2003-2022", fetcher=None, to_date=None, first_month="2003-01"):
+        """Дописывает в CSV-файл и базу SQLite только месяцы, которых в них еще нет.
+        Загружаются курсы с месяца, следующего за последним в CSV-файле (с first_month, если в файле
+        только заголовки), по месяц to_date.
+
+        :param csv_file_name: название CSV-файла с курсами
+        :param db_file_name: название файла базы
+        :param table_name: название таблицы
+        :param fetcher: объект класса RatesFetcher
+        :param to_date: дата, по которую нужны курсы (по умолчанию - сегодня)
+        :param first_month: первый месяц в формате ГГГГ-ММ для CSV-файла без строк с курсами
+        :return: CurrencyRates: новые курсы
+        """
+        headings, last_month = CurrencyRates.get_csv_bounds(csv_file_name)
+        titles = headings[1:]
+        to_date = datetime.now() if to_date is None else to_date
+        from_date = pd.Timestamp(first_month) if last_month is None else pd.Timestamp(last_month) + pd.offsets.MonthBegin(1)
+        list_dates = pd.date_range(from_date, to_date, freq="MS")
+        rates = Currency.get_rates(RatesFetcher() if fetcher is None else fetcher, titles,
+                                   {item: [] for item in headings}, list_dates)
+        rates.append_csv(csv_file_name)
+        db_last_month = CurrencyRates.get_db_last_month(db_file_name, table_name)
+        if db_last_month is not None and last_month is not None and db_last_month >= last_month:
+            rates.to_db(db_file_name, table_name, since=db_last_month)
+        else:
+            CurrencyRates.from_csv(csv_file_name).to_db(db_file_name, table_name, since=db_last_month)
+        return rates
+
 
 file_name = 'vacancies_dif_currencies.csv'
 if __name__ == '__main__':
-    dataframe = Currency(pd.read_csv(file_name))
-    dataframe.make_csv()
+    if 'update' in sys.argv:
+        Currency.update_rates()
+    else:
+        dataframe = Currency(pd.read_csv(file_name))
+        dataframe.make_csv()
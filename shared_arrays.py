@@ -0,0 +1,71 @@
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+
+class SharedArray:
+    """Передача массивов NumPy между процессами через multiprocessing.shared_memory вместо pickle.
+
+    Описание массива - кортеж (имя блока разделяемой памяти, форма, тип); pickle передает только его,
+    а сами данные процесс читает из разделяемой памяти.
+
+    До создания пула процессов нужно вызвать prepare: тогда процессы-исполнители используют resource_tracker
+    родительского процесса, и блок, созданный исполнителем, не удаляется при завершении исполнителя.
+    """
+    @staticmethod
+    def prepare():
+        """Запускает resource_tracker в текущем процессе, чтобы создаваемые затем процессы использовали его же.
+        """
+        resource_tracker.ensure_running()
+
+    @staticmethod
+    def create(array):
+        """Копирует массив в новый блок разделяемой памяти. Блок принадлежит вызывающему процессу,
+        который должен закрыть и удалить его (close и unlink), когда блок больше не нужен.
+
+        :param array: массив NumPy
+        :return: блок SharedMemory, массив в этом блоке и описание для других процессов
+        """
+        array = np.ascontiguousarray(array)
+        memory = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        shared = np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)
+        shared[...] = array
+        return memory, shared, (memory.name, array.shape, array.dtype.str)
+
+    @staticmethod
+    def attach(descriptor):
+        """Подключается к массиву в разделяемой памяти без копирования.
+
+        :param descriptor: описание из create или send
+        :return: блок SharedMemory (нужно держать, пока используется массив) и массив
+        """
+        name, shape, dtype = descriptor
+        memory = shared_memory.SharedMemory(name=name)
+        return memory, np.ndarray(shape, dtype=np.dtype(dtype), buffer=memory.buf)
+
+    @staticmethod
+    def send(array):
+        """Передает результат процесса: массив копируется в разделяемую память, возвращается только описание.
+        Блок удаляет получатель в receive.
+
+        :param array: массив NumPy
+        :return: описание массива
+        """
+        memory, shared, descriptor = SharedArray.create(array)
+        del shared
+        memory.close()
+        return descriptor
+
+    @staticmethod
+    def receive(descriptor):
+        """Забирает массив, переданный send: данные копируются, блок разделяемой памяти удаляется.
+
+        :param descriptor: описание массива
+        :return: np.ndarray
+        """
+        memory, shared = SharedArray.attach(descriptor)
+        array = shared.copy()
+        del shared
+        memory.close()
+        memory.unlink()
+        return array
@@ -1,21 +1,179 @@
-import pandas as pd
-import threading
+import csv
+import mmap
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
 
 class Split_CSV:
-    def __init__(self, file_name):
+    """Разделяет CSV-файл с вакансиями на файлы по годам публикации (или по значениям другой колонки)
+    за один проход по файлу.
+
+    Файл отображается в память (mmap), границы строк находятся с учетом переносов внутри кавычек,
+    а строки каждой части записываются в свой файл срезами исходного буфера, без разбора и повторной сериализации.
+    Файлы пишутся пулом из workers потоков, каждый поток накапливает срезы в буфере не больше
+    memory_budget / workers байт и сбрасывает его одной записью.
+
+    Attributes:
+        file_name (str): название исходного файла
+        directory (str): каталог для файлов частей
+        column (str): колонка, по которой делится файл: published_at (по годам), area_name, salary_currency
+        workers (int): количество потоков записи
+        memory_budget (int): суммарный размер буферов записи в байтах
+    """
+    def __init__(self, file_name, directory='csv_split_files', column='published_at', workers=4, memory_budget=64 * 2 ** 20):
+        """Инициализирует объект Split_CSV.
+
+        :param file_name: название исходного файла
+        :param directory: каталог для файлов частей
+        :param column: колонка, по которой делится файл
+        :param workers: количество потоков записи
+        :param memory_budget: суммарный размер буферов записи в байтах
+        """
         self.file_name = file_name
-        self.data = pd.read_csv(file_name)
+        self.directory = directory
+        self.column = column
+        self.workers = workers
+        self.memory_budget = memory_budget
+
+    @staticmethod
+    def iter_rows(buffer, start):
+        """Находит границы строк CSV, перенос строки внутри кавычек не считается концом строки.
+
+        :param buffer: отображенный в память файл
+        :param start: начало первой строки
+        :return: generator: пары (начало, конец) строк, конец включает перенос строки
+        """
+        size = len(buffer)
+        row_start = start
+        quotes = 0
+        position = start
+        while position < size:
+            end = buffer.find(b'\n', position)
+            end = size if end == -1 else end + 1
+            quotes += buffer[position:end].count(b'"')
+            position = end
+            if quotes % 2 == 0:
+                yield row_start, end
+                row_start = end
+                quotes = 0
+        if row_start < size:
+            yield row_start, size
+
+    @staticmethod
+    def get_year(row, column, last_column):
+        """Возвращает год публикации из строки CSV.
+
+        :param row: строка в байтах
+        :param column: номер колонки published_at
+        :param last_column: True, если published_at - последняя колонка
+        :return: str: год или None для пустой строки
+        """
+        value = Split_CSV.get_value(row, column, last_column)
+        return None if value is None else value[:4]
 
     @staticmethod
-    def to_csv(data: pd.DataFrame, file_name):
-        data.to_csv(path_or_buf=file_name, index=False, encoding='utf-8-sig')
+    def get_value(row, column, last_column):
+        """Возвращает значение колонки из строки CSV.
+
+        :param row: строка в байтах
+        :param column: номер колонки
+        :param last_column: True, если колонка последняя (значение берется после последней запятой без разбора строки)
+        :return: str: значение или None для пустой строки
+        """
+        row = row.rstrip(b'\r\n')
+        if not row:
+            return None
+        if last_column and not row.endswith(b'"'):
+            return row[row.rfind(b',') + 1:].decode()
+        return next(csv.reader([row.decode('utf-8')]))[column]
+
+    def get_part(self, row, column, last_column):
+        """Возвращает часть, в которую попадает строка: год для published_at, иначе значение колонки.
+
+        :param row: строка в байтах
+        :param column: номер колонки
+        :param last_column: True, если колонка последняя
+        :return: str: название части или None для пустой строки
+        """
+        if self.column == 'published_at':
+            return Split_CSV.get_year(row, column, last_column)
+        value = Split_CSV.get_value(row, column, last_column)
+        return None if value is None else re.sub(r'[\\/:*?"<>|]', '_', value) or 'unknown'
 
     def create_chunks(self):
-        years = self.data['published_at'].apply(lambda x: x[:4]).unique()
-        for year in years:
-            right_data = self.data[self.data['published_at'].str.contains(year)]
-            t = threading.Thread(target=self.to_csv, args=(right_data, f'csv_split_files/vacancies_by_{year}.csv'))
-            t.start()
-
-data = Split_CSV('vacancies_by_year.csv')
-data.create_chunks()
\ No newline at end of file
+        """Записывает строки каждой части в файл <directory>/vacancies_by_<год или значение колонки>.csv
+        и ждет завершения всех записей. Подряд идущие строки одной части записываются одним срезом буфера.
+        Для каждого файла печатается количество строк, размер и скорость записи.
+
+        :return: dict: ключ - год (значение колонки), значение - количество строк
+        """
+        counts = dict()
+        if os.path.getsize(self.file_name) == 0:
+            return counts
+        with open(self.file_name, mode='rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            data_start = buffer.find(b'\n') + 1 or len(buffer)
+            header = buffer[:data_start].removeprefix(b'\xef\xbb\xbf')
+            headings = next(csv.reader([header.decode('utf-8')]))
+            column = headings.index(self.column)
+            slices = dict()
+            for start, end in Split_CSV.iter_rows(buffer, data_start):
+                year = self.get_part(buffer[start:end], column, column == len(headings) - 1)
+                if year is None:
+                    continue
+                counts[year] = counts.get(year, 0) + 1
+                year_slices = slices.setdefault(year, [])
+                if year_slices and year_slices[-1][1] == start:
+                    year_slices[-1][1] = end
+                else:
+                    year_slices.append([start, end])
+            os.makedirs(self.directory, exist_ok=True)
+            view = memoryview(buffer)
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = {year: executor.submit(self.write_part, year, header, view, year_slices)
+                           for year, year_slices in slices.items()}
+                for year, future in futures.items():
+                    size, elapsed = future.result()
+                    print(f"vacancies_by_{year}.csv: {counts[year]} строк, {size / 2 ** 20:.1f} МБ, "
+                          f"{size / 2 ** 20 / max(elapsed, 1e-9):.1f} МБ/с")
+            view.release()
+        return counts
+
+    def write_part(self, year, header, view, year_slices):
+        """Записывает файл одной части: заголовок и срезы буфера. Короткие срезы собираются в буфер
+        размером не больше memory_budget / workers и записываются одной операцией.
+
+        :param year: год (значение колонки)
+        :param header: строка заголовков в байтах
+        :param view: memoryview отображенного файла
+        :param year_slices: список пар [начало, конец] строк этой части
+        :return: размер файла в байтах и время записи в секундах
+        """
+        start_time = perf_counter()
+        buffer_size = max(1, self.memory_budget // self.workers)
+        newline = b'\r\n' if header.endswith(b'\r\n') else b'\n'
+        with open(os.path.join(self.directory, f'vacancies_by_{year}.csv'), mode='wb') as file:
+            file.write(b'\xef\xbb\xbf' + (header if header.endswith(b'\n') else header + newline))
+            pending = bytearray()
+            for start, end in year_slices:
+                if len(pending) + end - start > buffer_size:
+                    file.write(pending)
+                    pending.clear()
+                if end - start > buffer_size:
+                    file.write(view[start:end])
+                else:
+                    pending += view[start:end]
+            file.write(pending)
+            if view[year_slices[-1][1] - 1] != ord('\n'):
+                file.write(newline)
+            size = file.tell()
+        return size, perf_counter() - start_time
+
+
+if __name__ == '__main__':
+    file_name = sys.argv[1] if len(sys.argv) > 1 else 'vacancies_by_year.csv'
+    column = sys.argv[2] if len(sys.argv) > 2 else 'published_at'
+    data = Split_CSV(file_name, column=column)
+    data.create_chunks()
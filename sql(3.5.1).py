@@ -1,6 +1,3 @@
-import sqlite3
-import pandas as pd
+from currency_rates import CurrencyRates
 
-con = sqlite3.connect('currency_2003-2022.db')
-df = pd.read_csv('currency_2003-2022.csv')
-df.to_sql(name='currency_2003-2022', con=sqlite3.connect('currency_2003-2022.db'), index=False)
\ No newline at end of file
+CurrencyRates.from_csv('currency_2003-2022.csv').to_db('currency_2003-2022.db')
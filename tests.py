@@ -1,11 +1,86 @@
+import asyncio
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 from unittest import TestCase, main
-from main import DataSet, Vacancy, InputConnect
+import aiohttp
+import numpy as np
+import pandas as pd
+from main import DataSet, Vacancy, InputConnect, VacancyStatistics
+from currency_rates import CurrencyRates
+from salary_currencies import Currency, RatesFetcher
+from vacancies_db import VacanciesDB
+from name_index import NameIndex, ProfessionMatcher
+from columns_cache import ColumnsCache
+from split_csv import Split_CSV
+from vacancy_shards import Shards
+from vacancy_cube import VacancyCube
+from hh_api_stub import HHStubServer
+import multiprocessin
+from executors import Executor
+from shared_arrays import SharedArray
+import pickle
+from benchmarks import load_module
+
+XML_DAILY = """<?xml version="1.0" encoding="windows-1251"?>
+<ValCurs Date="{date}" name="Foreign Currency Market">
+<Valute ID="R01235"><NumCode>840</NumCode><CharCode>USD</CharCode><Nominal>1</Nominal><Name>Доллар США</Name><Value>31,7844</Value></Valute>
+<Valute ID="R01335"><NumCode>398</NumCode><CharCode>KZT</CharCode><Nominal>100</Nominal><Name>Тенге</Name><Value>20,3925</Value></Valute>
+</ValCurs>"""
+
+class StubServer:
+    """Локальный HTTP-сервер, который отвечает на запросы так же, как XML_daily.asp ЦБ РФ.
+    Первые failures запросов завершаются ошибкой status."""
+    def __init__(self, failures=0, status=503):
+        self.requests = []
+        self.failures = failures
+        self.status = status
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests.append(self.path)
+                if len(stub.requests) <= stub.failures:
+                    self.send_error(stub.status)
+                    return
+                date = parse_qs(urlparse(self.path).query)['date_req'][0].replace('/', '.')
+                body = XML_DAILY.format(date=date).encode('windows-1251')
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/scripts/XML_daily.asp'
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
 
 class DataSetTest(TestCase):
     def test_input(self):
         self.assertEqual(DataSet('vacancies_by_year.csv').file_name, "vacancies_by_year.csv")
         self.assertEqual(len(DataSet("vacancies_by_year.csv").vacancies_objects), 0)
 
+    def test_iter_vacancies(self):
+        vacancies = list(DataSet.iter_vacancies("csv_split_files/vacancies_by_2007.csv"))
+        dataset = DataSet.get_dataset("csv_split_files/vacancies_by_2007.csv")
+        self.assertEqual(len(vacancies), len(dataset.vacancies_objects))
+        self.assertEqual(vacancies[0].salary_from, 35000.0)
+        self.assertEqual(vacancies[0].published_at, 2007)
+
 class VacancyTests(TestCase):
     def test_vacancy_type(self):
         self.assertEqual(type(Vacancy(args=['Программист баз данных', '36000', '50000', 'RUR', 'Москва', '2007'])).__name__, "Vacancy")
@@ -47,3 +122,502 @@ class InputConnectTests(TestCase):
         self.assertEqual(vacancy_proportion["Псков"], 1367)
         self.assertEqual(vacancy_proportion["Саратов"], 7528)
 
+class VacancyStatisticsTests(TestCase):
+    def test_matches_input_connect(self):
+        dataset = DataSet.get_dataset("csv_split_files/vacancies_by_2008.csv")
+        statistics = VacancyStatistics.from_vacancies(dataset.vacancies_objects, "Программист")
+        self.assertEqual(statistics.get_count_vacancies(), InputConnect.get_count_vacancies(dataset, "all"))
+        self.assertEqual(statistics.get_count_vacancies_by_profession(),
+                         InputConnect.get_count_vacancies_by_profession(dataset, "Программист"))
+        self.assertEqual(statistics.count_by_cities, InputConnect.get_proportion_vacancy_by_cities(dataset))
+
+    def test_from_columns(self):
+        dataset = DataSet.get_dataset("csv_split_files/vacancies_by_2008.csv")
+        by_columns = VacancyStatistics.from_columns(dataset.columns, "Программист")
+        by_vacancies = VacancyStatistics.from_vacancies(dataset.vacancies_objects, "Программист")
+        self.assertEqual(by_columns.salary_by_year, by_vacancies.salary_by_year)
+        self.assertEqual(by_columns.salary_by_profession, by_vacancies.salary_by_profession)
+        self.assertEqual(list(by_columns.salary_by_cities.items()), list(by_vacancies.salary_by_cities.items()))
+
+    def test_from_columns_batch(self):
+        dataset = DataSet.get_dataset("csv_split_files/vacancies_by_2008.csv")
+        professions = ["Программист", "программист", "1С", "Менеджер"]
+        batch = VacancyStatistics.from_columns_batch(dataset.columns, professions)
+        for profession in professions:
+            self.assertEqual(batch[profession].get_report(),
+                             VacancyStatistics.from_columns(dataset.columns, profession).get_report())
+
+    def test_empty(self):
+        statistics = VacancyStatistics("Программист")
+        self.assertEqual(statistics.get_general_salary_level_by_year(), {2022: 0})
+        self.assertEqual(statistics.get_salary_level_by_profession(), {2022: 0})
+
+class ConverterTests(TestCase):
+    def test_convert_salary(self):
+        converter = load_module('convert_currencies(3.4.1).py').Converter
+        data = pd.DataFrame({'salary_from': [1000.0, 100.0, 30000.0, None],
+                             'salary_to': [2000.0, None, 50000.0, None],
+                             'salary_currency': ['USD', 'EUR', 'RUR', None],
+                             'published_at': ['2003-01-24T21:30:49+0300', '2022-07-01T10:00:00+0300',
+                                              '2003-01-24T21:30:49+0300', '2003-01-24T21:30:49+0300']})
+        salary = converter('converted_vacancies_dif_currencies(3.4.1).csv', 'currency_2003-2022.csv').convert_salary(data)
+        self.assertEqual(list(salary[:3]), [round(1500 * 31.7844), round(100 * 54.6405), '40000.0 RUR 2003-01-24T21:30:49+0300'])
+        self.assertTrue(pd.isnull(salary[3]))
+
+    def test_make_csv_by_chunks(self):
+        converter = load_module('convert_currencies(3.4.1).py').Converter
+        with tempfile.TemporaryDirectory() as directory:
+            whole, chunked = os.path.join(directory, 'whole.csv'), os.path.join(directory, 'chunked.csv')
+            converter('vacanciesHH_2022-12-25.csv', 'currency_2003-2022.csv').make_csv(whole, 1000)
+            converter('vacanciesHH_2022-12-25.csv', 'currency_2003-2022.csv', chunk_size=300).make_csv(chunked, 1000)
+            with open(whole, 'rb') as whole_file, open(chunked, 'rb') as chunked_file:
+                self.assertEqual(whole_file.read(), chunked_file.read())
+        with self.assertRaises(ValueError):
+            converter('vacanciesHH_2022-12-25.csv', 'currency_2003-2022.csv', chunk_size=300, use_cache=True)
+
+    def test_make_csv_in_processes(self):
+        converter = load_module('convert_currencies(3.4.1).py').Converter
+        with tempfile.TemporaryDirectory() as directory:
+            serial, parallel = os.path.join(directory, 'serial.csv'), os.path.join(directory, 'parallel.csv')
+            converter('vacanciesHH_2022-12-25.csv', 'currency_2003-2022.csv', chunk_size=300).make_csv(serial, 3000)
+            converter('vacanciesHH_2022-12-25.csv', 'currency_2003-2022.csv', chunk_size=300,
+                      processes=2).make_csv(parallel, 3000)
+            with open(serial, 'rb') as serial_file, open(parallel, 'rb') as parallel_file:
+                self.assertEqual(serial_file.read(), parallel_file.read())
+
+class CurrencyRatesTests(TestCase):
+    def test_csv_and_db(self):
+        rates_csv = CurrencyRates.from_csv('currency_2003-2022.csv')
+        rates_db = CurrencyRates.from_db('currency_2003-2022.db')
+        self.assertEqual(rates_csv.months, rates_db.months)
+        self.assertEqual(rates_csv.get_rate('USD', '2003-01'), 31.7844)
+        self.assertEqual(rates_db.get_rate('USD', '2003-01'), 31.7844)
+        self.assertIsNone(rates_csv.get_rate('BYR', '2022-07'))
+
+    def test_counters(self):
+        rates = CurrencyRates.from_csv('currency_2003-2022.csv')
+        for month in ('2010-01', '2010-01', '2010-02'):
+            rates.get_rate('EUR', month)
+        self.assertEqual((rates.hits, rates.misses), (1, 2))
+
+    def test_to_csv(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'currency.csv')
+            CurrencyRates.from_csv('currency_2003-2022.csv').to_csv(file_name)
+            with open(file_name, 'rb') as file, open('currency_2003-2022.csv', 'rb') as original:
+                self.assertEqual(file.read(), original.read())
+
+class RatesFetcherTests(TestCase):
+    def test_fetch_with_retries_and_cache(self):
+        dates = [datetime(2003, month, 1) for month in range(1, 6)]
+        with tempfile.TemporaryDirectory() as directory, StubServer(failures=2) as server:
+            responses = RatesFetcher(url=server.url, cache_dir=directory, limit=2, backoff=0.01).get_responses(dates)
+            self.assertEqual(len(server.requests), 7)
+            self.assertEqual(RatesFetcher.parse_rates(responses[0], ['USD', 'KZT']), {'USD': 31.7844, 'KZT': 0.203925})
+
+            fetcher = RatesFetcher(url=server.url, cache_dir=directory)
+            self.assertEqual(fetcher.get_responses(dates + [datetime(2003, 6, 1)])[:5], responses)
+            self.assertEqual(fetcher.requests_count, 1)
+            self.assertTrue(server.requests[-1].endswith('date_req=01/06/2003'))
+
+    def test_client_errors_not_retried(self):
+        with tempfile.TemporaryDirectory() as directory, StubServer(failures=5, status=404) as server:
+            fetcher = RatesFetcher(url=server.url, cache_dir=directory, backoff=0.01)
+            with self.assertRaises(aiohttp.ClientResponseError) as context:
+                fetcher.get_responses([datetime(2003, 1, 1)])
+        self.assertEqual(context.exception.status, 404)
+        self.assertEqual(len(server.requests), 1)
+
+    def test_update_rates(self):
+        with tempfile.TemporaryDirectory() as directory, StubServer() as server:
+            shutil.copy('currency_2003-2022.csv', directory)
+            shutil.copy('currency_2003-2022.db', directory)
+            csv_file_name = os.path.join(directory, 'currency_2003-2022.csv')
+            db_file_name = os.path.join(directory, 'currency_2003-2022.db')
+            fetcher = RatesFetcher(url=server.url, cache_dir=os.path.join(directory, 'cache'))
+            for _ in range(2):
+                Currency.update_rates(csv_file_name, db_file_name, fetcher=fetcher, to_date=datetime(2022, 9, 15))
+            self.assertEqual(len(server.requests), 2)
+            rates = CurrencyRates.from_csv(csv_file_name)
+            self.assertEqual(list(rates.months)[-3:], ['2022-07', '2022-08', '2022-09'])
+            self.assertEqual(rates.get_rate('USD', '2022-09'), 31.7844)
+            with sqlite3.connect(db_file_name) as connection:
+                self.assertEqual(connection.execute('SELECT COUNT(*), MAX(dat) FROM "currency_2003-2022"').fetchone(),
+                                 (237, '2022-09'))
+
+    def test_update_rates_from_headers_only(self):
+        with tempfile.TemporaryDirectory() as directory, StubServer() as server:
+            csv_file_name = os.path.join(directory, 'currency.csv')
+            db_file_name = os.path.join(directory, 'currency.db')
+            with open('currency_2003-2022.csv', mode='r', encoding='utf-8-sig') as source, \
+                    open(csv_file_name, mode='w', encoding='utf-8') as file:
+                file.write(source.readline())
+            fetcher = RatesFetcher(url=server.url, cache_dir=os.path.join(directory, 'cache'))
+            Currency.update_rates(csv_file_name, db_file_name, fetcher=fetcher, to_date=datetime(2003, 3, 15))
+            rates = CurrencyRates.from_csv(csv_file_name)
+            self.assertEqual(list(rates.months), ['2003-01', '2003-02', '2003-03'])
+            self.assertEqual(rates.get_rate('USD', '2003-03'), 31.7844)
+            self.assertEqual(CurrencyRates.get_db_last_month(db_file_name), '2003-03')
+
+class VacanciesFetcherTests(TestCase):
+    def test_make_csv(self):
+        source = pd.read_csv('vacanciesHH_2022-12-25.csv')
+        with tempfile.TemporaryDirectory() as directory, \
+                HHStubServer('vacanciesHH_2022-12-25.csv', failures=1) as server:
+            fetcher = load_module('vacanciesHH(3.3.3).py').VacanciesFetcher(url=server.url, limit=4, backoff=0.01)
+            file_name = os.path.join(directory, 'vacancies.csv')
+            self.assertEqual(fetcher.make_csv(file_name, datetime(2022, 12, 25), datetime(2022, 12, 26)), len(source))
+            result = pd.read_csv(file_name)
+        self.assertEqual(list(result.columns), list(source.columns))
+        self.assertTrue(result.sort_values(list(result.columns), ignore_index=True).equals(
+            source.sort_values(list(source.columns), ignore_index=True)))
+        self.assertGreater(len({(query['date_from'], query['date_to']) for query in server.requests}), 1)
+
+    def test_make_csv_twice(self):
+        with tempfile.TemporaryDirectory() as directory, HHStubServer('vacanciesHH_2022-12-25.csv') as server:
+            fetcher = load_module('vacanciesHH(3.3.3).py').VacanciesFetcher(url=server.url)
+            counts = [fetcher.make_csv(os.path.join(directory, f'{number}.csv'), datetime(2022, 12, 25),
+                                       datetime(2022, 12, 26)) for number in range(2)]
+            requests_count = fetcher.requests_count
+            with open(os.path.join(directory, '0.csv'), 'rb') as first, open(os.path.join(directory, '1.csv'), 'rb') as second:
+                self.assertEqual(len(first.read()), len(second.read()))
+        self.assertEqual(counts, [3364, 3364])
+        self.assertEqual(requests_count, len(server.requests) // 2)
+
+    def test_client_errors_not_retried(self):
+        fetcher_class = load_module('vacanciesHH(3.3.3).py').VacanciesFetcher
+
+        async def fetch_page(fetcher, page):
+            async with aiohttp.ClientSession() as session:
+                return await fetcher.fetch_page(session, asyncio.Semaphore(1), datetime(2022, 12, 25),
+                                                datetime(2022, 12, 26), page)
+
+        with HHStubServer('vacanciesHH_2022-12-25.csv', failures=1) as server:
+            fetcher = fetcher_class(url=server.url, backoff=0.01)
+            self.assertEqual(asyncio.run(fetch_page(fetcher, 0))['found'], 3364)
+            self.assertEqual(fetcher.requests_count, 2)
+            with self.assertRaises(aiohttp.ClientResponseError) as context:
+                asyncio.run(fetch_page(fetcher, 20))
+        self.assertEqual(context.exception.status, 400)
+        self.assertEqual(fetcher.requests_count, 3)
+
+class VacanciesDBTests(TestCase):
+    def test_statistics_match_input_connect(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db = VacanciesDB(os.path.join(directory, 'vacancies.db'))
+            db.load_csv('csv_split_files/vacancies_by_2008.csv')
+            dataset = DataSet.get_dataset('csv_split_files/vacancies_by_2008.csv')
+            self.assertEqual(db.get_statistics('Программист').get_report(),
+                             InputConnect('csv_split_files/vacancies_by_2008.csv', 'Программист').print(dataset))
+
+    def test_load_same_file_twice(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db = VacanciesDB(os.path.join(directory, 'vacancies.db'))
+            self.assertTrue(db.load_csv('csv_split_files/vacancies_by_2008.csv'))
+            statistics = db.get_year_statistics('программист')
+            self.assertFalse(db.load_csv('csv_split_files/vacancies_by_2008.csv'))
+            self.assertEqual(db.get_year_statistics('программист'), statistics)
+            self.assertEqual(statistics[1], {'2008': 17549})
+            self.assertEqual(db.get_area_statistics('1С', 'Москва'), db.get_area_statistics('1с', 'Москва'))
+
+    def test_load_changed_and_same_named_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db = VacanciesDB(os.path.join(directory, 'vacancies.db'))
+            os.makedirs(os.path.join(directory, 'other'))
+            file_name, other_file_name = os.path.join(directory, 'conv.csv'), os.path.join(directory, 'other', 'conv.csv')
+            data = pd.DataFrame({'name': ['Аналитик', 'Программист', 'Аналитик'], 'salary': [100.0, None, 300.0],
+                                 'area_name': ['Москва', 'Казань', 'Москва'],
+                                 'published_at': ['2008-01-01T00:00:00+0300', '2008-05-01T00:00:00+0300',
+                                                  '2009-01-01T00:00:00+0300']})
+            data[:2].to_csv(file_name, index=False)
+            data[2:].to_csv(other_file_name, index=False)
+            self.assertTrue(db.load_csv(file_name))
+            self.assertTrue(db.load_csv(other_file_name))
+            self.assertEqual(db.get_year_statistics('аналитик')[1], {'2008': 2, '2009': 1})
+            data[:1].to_csv(file_name, index=False)
+            self.assertTrue(db.load_csv(file_name))
+            self.assertFalse(db.load_csv(file_name))
+            self.assertEqual(db.get_year_statistics('аналитик')[1], {'2008': 1, '2009': 1})
+            self.assertTrue(db.is_converted())
+            with self.assertRaises(ValueError):
+                db.get_statistics('Аналитик')
+            with self.assertRaises(ValueError):
+                db.load_csv('csv_split_files/vacancies_by_2008.csv')
+
+class NameIndexTests(TestCase):
+    def test_matches_full_scan(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'vacancies.csv')
+            shutil.copy('csv_split_files/vacancies_by_2008.csv', file_name)
+            names = DataSet.get_dataset(file_name).columns.names
+            NameIndex.load_or_build(file_name, names)
+            index = NameIndex.load(f'{file_name}.names.npz', names, file_name)
+            self.assertIsNotNone(index)
+            for profession in ('Программист', 'аналитик', 'C++', '1С', 'Qt'):
+                self.assertEqual(list(index.get_mask(profession)), [profession in name for name in names])
+                self.assertEqual(list(index.get_mask(profession, case=False)),
+                                 list(pd.Series(names).str.contains(profession, case=False)))
+
+    def test_profession_matcher(self):
+        names = DataSet.get_dataset('csv_split_files/vacancies_by_2008.csv').columns.names
+        professions = ['Программист', 'программист', 'грамм', 'C++', '1С', '']
+        for case in (True, False):
+            masks = ProfessionMatcher(professions, case).get_masks(names)
+            for profession in professions:
+                expected = ([profession in name for name in names] if case
+                            else list(pd.Series(names).str.contains(profession, case=False)))
+                self.assertEqual(list(masks[profession]), expected)
+
+class ColumnsCacheTests(TestCase):
+    def test_dataset_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'vacancies.csv')
+            shutil.copy('csv_split_files/vacancies_by_2008.csv', file_name)
+            parsed = DataSet.get_dataset(file_name, use_cache=True).columns
+            self.assertTrue(ColumnsCache(file_name).is_valid())
+            cached = DataSet.get_dataset(file_name, use_cache=True).columns
+            self.assertEqual(cached.names, parsed.names)
+            self.assertEqual(cached.areas, parsed.areas)
+            self.assertTrue((cached.get_salaries() == parsed.get_salaries()).all())
+            self.assertEqual(VacancyStatistics.from_columns(cached, 'Программист').get_report(),
+                             VacancyStatistics.from_columns(parsed, 'Программист').get_report())
+            with open(file_name, 'a', encoding='utf-8') as file:
+                file.write('\n')
+            self.assertFalse(ColumnsCache(file_name).is_valid())
+
+    def test_read_csv(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'vacancies.csv')
+            shutil.copy('vacanciesHH_2022-12-25.csv', file_name)
+            ColumnsCache(file_name).read_csv()
+            pd.testing.assert_frame_equal(ColumnsCache(file_name).read_csv(), pd.read_csv(file_name))
+
+class SplitCSVTests(TestCase):
+    def test_create_chunks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'vacancies.csv')
+            data = pd.concat([pd.read_csv('csv_split_files/vacancies_by_2007.csv'),
+                              pd.read_csv('csv_split_files/vacancies_by_2008.csv')]).sample(frac=1, random_state=0)
+            data.to_csv(file_name, index=False)
+            counts = Split_CSV(file_name, directory).create_chunks()
+            self.assertEqual(counts, {'2007': 2196, '2008': 17549})
+            for year in counts:
+                pd.testing.assert_frame_equal(pd.read_csv(os.path.join(directory, f'vacancies_by_{year}.csv')),
+                                              data[data['published_at'].str.startswith(year)].reset_index(drop=True))
+
+    def test_partition_by_currency(self):
+        with tempfile.TemporaryDirectory() as directory:
+            data = pd.read_csv('vacanciesHH_2022-12-25.csv')
+            counts = Split_CSV('vacanciesHH_2022-12-25.csv', directory, column='salary_currency',
+                               workers=2, memory_budget=4096).create_chunks()
+            self.assertEqual(sum(counts.values()), data.shape[0])
+            for currency in data['salary_currency'].dropna().unique():
+                pd.testing.assert_frame_equal(pd.read_csv(os.path.join(directory, f'vacancies_by_{currency}.csv')),
+                                              data[data['salary_currency'] == currency].reset_index(drop=True))
+
+class YearReportTests(TestCase):
+    def test_get_data(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'converted.csv')
+            pd.DataFrame({'name': ['Аналитик', 'Программист', 'аналитик данных', 'Тестировщик', 'Программист'],
+                          'salary': [100.0, 200.0, 301.0, None, 50.0],
+                          'area_name': ['Москва'] * 5,
+                          'published_at': ['2008-01-01T00:00:00+0300', '2007-05-01T00:00:00+0300',
+                                           '2007-06-01T00:00:00+0300', '2009-01-01T00:00:00+0300',
+                                           '2009-02-01T00:00:00+0300']}).to_csv(file_name, index=False)
+            report = load_module('3.4.2.py').Report(file_name, 'аналитик')
+            self.assertEqual(report.get_data(), ({'2007': 250, '2008': 100, '2009': 50},
+                                                 {'2007': 2, '2008': 1, '2009': 2},
+                                                 {'2007': 301, '2008': 100, '2009': 0},
+                                                 {'2007': 1, '2008': 1, '2009': 0}))
+            self.assertEqual(report.get_batch_data(['аналитик', 'программист'])['программист'][2:],
+                             ({'2007': 200, '2008': 0, '2009': 50}, {'2007': 1, '2008': 0, '2009': 1}))
+
+class AreaReportTests(TestCase):
+    def test_cube(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'converted.csv')
+            pd.DataFrame({'name': ['Аналитик', 'Программист', 'аналитик данных', 'Аналитик', 'Программист'],
+                          'salary': [100.0, 200.0, 301.0, None, 50.0],
+                          'area_name': ['Москва', 'Москва', 'Казань', 'Москва', 'Казань'],
+                          'published_at': ['2008-01-01T00:00:00+0300', '2007-05-01T00:00:00+0300',
+                                           '2007-06-01T00:00:00+0300', '2009-01-01T00:00:00+0300',
+                                           '2009-02-01T00:00:00+0300']}).to_csv(file_name, index=False)
+            report = load_module('3.4.3.py').Report(file_name, 'аналитик', 'Москва')
+            self.assertEqual(report.get_data_area(), ({'2008': 100, '2009': 0}, {'2008': 1, '2009': 1}))
+            self.assertEqual(report.get_batch_data_area([('программист', 'Казань'), ('аналитик', 'Омск')]),
+                             {('программист', 'Казань'): ({'2009': 50}, {'2009': 1}), ('аналитик', 'Омск'): ({}, {})})
+            self.assertEqual(report.cube_professions, ['аналитик', 'программист'])
+            self.assertEqual(report.get_data_areas(), ({'Казань': 176, 'Москва': 150}, {'Москва': 0.6, 'Казань': 0.4}))
+
+class VacancyCubeTests(TestCase):
+    def test_matches_input_connect(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'vacancies.cube.npz')
+            VacancyCube.from_csv('csv_split_files/vacancies_by_2008.csv', ['Программист', 'Менеджер']).save(file_name)
+            cube = VacancyCube.load(file_name)
+        dataset = DataSet.get_dataset('csv_split_files/vacancies_by_2008.csv')
+        for profession in ['Программист', 'Менеджер']:
+            self.assertEqual(cube.get_statistics(profession).get_report(),
+                             InputConnect('csv_split_files/vacancies_by_2008.csv', profession).print(dataset))
+        self.assertEqual(list(cube.aggregate('currency')), ['RUR'])
+        with self.assertRaises(ValueError):
+            cube.get_statistics('Аналитик')
+
+    def test_historical_rates_saved(self):
+        rates = CurrencyRates.from_csv('currency_2003-2022.csv')
+        with tempfile.TemporaryDirectory() as directory:
+            csv_file_name = os.path.join(directory, 'vacancies.csv')
+            file_name = os.path.join(directory, 'vacancies.cube.npz')
+            pd.DataFrame({'name': ['Программист', 'Аналитик', 'Программист'],
+                          'salary_from': [1000.0, 50000.0, 100.0], 'salary_to': [2000.0, 60000.0, 300.0],
+                          'salary_currency': ['USD', 'RUR', 'EUR'], 'area_name': ['Москва', 'Казань', 'Москва'],
+                          'published_at': ['2003-01-24T21:30:49+0300', '2003-02-01T10:00:00+0300',
+                                           '2022-07-01T10:00:00+0300']}).to_csv(csv_file_name, index=False)
+            VacancyCube.from_csv(csv_file_name, ['Программист'], rates).save(file_name)
+            cube = VacancyCube.load(file_name)
+            fixed = VacancyCube.from_csv(csv_file_name, ['Программист'])
+            dataset = DataSet.get_dataset(csv_file_name)
+            report = InputConnect(csv_file_name, 'Программист', currency_rates=rates).print(dataset)
+        self.assertTrue(cube.historical_rates)
+        self.assertFalse(fixed.historical_rates)
+        self.assertEqual(cube.get_statistics('Программист').get_report(), report)
+        self.assertNotEqual(fixed.get_statistics('Программист').get_report(), report)
+
+    def test_ingest_matches_rebuild(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'vacancies.cube.npz')
+            full_file_name = os.path.join(directory, 'full.csv')
+            with open(full_file_name, 'w', encoding='utf-8') as file:
+                for number, part in enumerate(['csv_split_files/vacancies_by_2008.csv', 'vacanciesHH_2022-12-25.csv']):
+                    with open(part, encoding='utf-8-sig') as source:
+                        lines = source.read().splitlines(True)[number > 0:]
+                    file.writelines(line if line.endswith('\n') else line + '\n' for line in lines)
+            professions = ['Программист', 'Тестировщик']
+            VacancyCube.from_csv('csv_split_files/vacancies_by_2008.csv', professions).save(file_name)
+            self.assertTrue(VacancyCube.ingest(file_name, 'vacanciesHH_2022-12-25.csv'))
+            self.assertFalse(VacancyCube.ingest(file_name, 'vacanciesHH_2022-12-25.csv'))
+            cube = VacancyCube.load(file_name)
+            rebuilt = VacancyCube.from_csv(full_file_name, professions)
+            with self.assertRaises(ValueError):
+                VacancyCube.ingest(file_name, 'csv_split_files/vacancies_by_2009.csv',
+                                   CurrencyRates.from_csv('currency_2003-2022.csv'))
+            with self.assertRaises(ValueError):
+                VacancyCube.ingest(file_name, 'converted_vacancies_dif_currencies(3.4.1).csv')
+            self.assertEqual(VacancyCube.load(file_name).sources, cube.sources)
+            other_file_name = os.path.join(directory, 'other', 'vacanciesHH_2022-12-25.csv')
+            os.makedirs(os.path.dirname(other_file_name))
+            shutil.copy('vacanciesHH_2022-12-25.csv', other_file_name)
+            self.assertTrue(VacancyCube.ingest(file_name, other_file_name))
+            with open(other_file_name, 'a', encoding='utf-8') as file:
+                file.write('Программист,100.0,200.0,RUR,Москва,2022-12-26T10:00:00+0300\n')
+            with self.assertRaises(ValueError):
+                VacancyCube.ingest(file_name, other_file_name)
+            self.assertEqual(len(VacancyCube.load(file_name).sources), 3)
+        self.assertEqual([os.path.basename(path) for path, key in cube.sources],
+                         ['vacancies_by_2008.csv', 'vacanciesHH_2022-12-25.csv'])
+        self.assertEqual(cube.sources[1], VacancyCube.get_source('vacanciesHH_2022-12-25.csv'))
+        self.assertTrue(cube.equals(rebuilt))
+        for profession in professions:
+            self.assertEqual([list(values.items()) for values in cube.get_statistics(profession).get_report()],
+                             [list(values.items()) for values in rebuilt.get_statistics(profession).get_report()])
+
+    def test_matches_reports(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'converted.csv')
+            pd.DataFrame({'name': ['Аналитик', 'Программист', 'аналитик данных', 'Аналитик', 'Программист'],
+                          'salary': [100.0, 200.0, 301.0, None, 50.0],
+                          'area_name': ['Москва', 'Москва', 'Казань', 'Москва', 'Казань'],
+                          'published_at': ['2008-01-01T00:00:00+0300', '2007-05-01T00:00:00+0300',
+                                           '2007-06-01T00:00:00+0300', '2009-01-01T00:00:00+0300',
+                                           '2009-02-01T00:00:00+0300']}).to_csv(file_name, index=False)
+            cube = VacancyCube.from_csv(file_name, ['аналитик'])
+            year_report = load_module('3.4.2.py').Report(file_name, 'аналитик')
+            area_report = load_module('3.4.3.py').Report(file_name, 'аналитик', 'Москва')
+            self.assertEqual(cube.get_year_statistics('аналитик'), year_report.get_data())
+            self.assertEqual(cube.get_area_statistics('аналитик', 'Москва'), area_report.get_data_area())
+            self.assertEqual(cube.get_areas_statistics(), area_report.get_data_areas())
+
+class ShardsTests(TestCase):
+    def test_boundaries(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'vacancies.csv')
+            with open(file_name, 'wb') as file:
+                file.write(b'name,salary_from,salary_to,salary_currency,area_name,published_at\n"a\nb",1,2,RUR,A,2007-01\n'
+                           b'c,1,2,RUR,B,2008-02\n"d\n\ne",1,2,RUR,C,2009-03\n')
+            shards = Shards.get_file_shards(file_name, 5)
+            self.assertEqual([list(Shards.read_shard(shard)['name']) for shard in shards], [['a\nb'], ['c'], ['d\n\ne']])
+
+    def test_matches_per_file(self):
+        per_file = multiprocessin.DataSet()
+        per_file.get_not_multiproc()
+        sharded = multiprocessin.DataSet()
+        sharded.get_shards_multiproc(shard_size=500000)
+        self.assertEqual(sharded.get_data_dict(), per_file.get_data_dict())
+
+    def test_cities_match_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'vacancies.csv')
+            with open(file_name, 'w', encoding='utf-8') as file:
+                for number, part in enumerate(sorted(os.listdir('csv_split_files'))):
+                    with open(os.path.join('csv_split_files', part), encoding='utf-8-sig') as source:
+                        file.writelines(source.readlines()[number > 0:])
+            expected = VacancyStatistics.from_vacancies(DataSet.iter_vacancies(file_name), 'Программист')
+        sharded = multiprocessin.DataSet()
+        sharded.get_analytics('imap_unordered', workers=2, shard_size=200000)
+        self.assertEqual([list(cities.items()) for cities in sharded.cities],
+                         [list(cities.items()) for cities in expected.get_report()[4:]])
+
+class ExecutorTests(TestCase):
+    def test_backends(self):
+        for backend in Executor.backends:
+            self.assertEqual(sorted(Executor(backend, workers=2).map(abs, range(-5, 5))), sorted(map(abs, range(-5, 5))))
+        with self.assertRaises(ValueError):
+            Executor('gpu')
+        self.assertEqual(Executor('imap_unordered', workers=2).get_chunksize(list(range(40))), 5)
+        self.assertEqual(Executor('imap_unordered', workers=2).get_chunksize(list(range(3))), 1)
+        self.assertEqual(Executor('imap_unordered', workers=2, chunksize=3).get_chunksize(list(range(40))), 3)
+
+    def test_analytics(self):
+        serial = multiprocessin.DataSet()
+        serial.get_analytics('serial', shard_size=500000)
+        threads = multiprocessin.DataSet()
+        threads.get_analytics('thread', workers=3, shard_size=500000)
+        self.assertEqual(list(threads.get_data_dict()), list(serial.get_data_dict()))
+        chunked = multiprocessin.DataSet()
+        chunked.get_analytics('imap_unordered', workers=2, shard_size=200000, chunksize=3)
+        self.assertEqual(chunked.get_data_dict(), serial.get_data_dict())
+
+class SharedMemoryTests(TestCase):
+    def test_analytics(self):
+        pickled = multiprocessin.DataSet()
+        pickled.get_analytics('serial', shard_size=500000)
+        shared = multiprocessin.DataSet()
+        shared.get_analytics('process', workers=2, shard_size=500000, shared_memory=True)
+        self.assertEqual(shared.get_data_dict(), pickled.get_data_dict())
+        self.assertEqual(shared.cities, pickled.cities)
+
+    def test_send_receive(self):
+        array = np.arange(12, dtype=np.float64).reshape(4, 3)
+        descriptor = SharedArray.send(array)
+        received = SharedArray.receive(descriptor)
+        np.testing.assert_array_equal(received, array)
+        self.assertEqual(received.dtype, array.dtype)
+        with self.assertRaises(FileNotFoundError):
+            SharedArray.attach(descriptor)
+
+    def test_rates(self):
+        rates = CurrencyRates.from_csv('currency_2003-2022.csv')
+        rates.share()
+        try:
+            copy = pickle.loads(pickle.dumps(rates))
+            self.assertEqual(copy.get_rate('USD', '2003-01'), 31.7844)
+            rates.rates[0, 0] = 99.0
+            self.assertEqual(copy.lookup('USD', '2003-01'), 99.0)
+            rates.rates[0, 0] = 31.7844
+            del copy.rates
+            copy.memory.close()
+        finally:
+            rates.release()
+        self.assertIsNone(rates.shared)
+        self.assertEqual(rates.get_rate('USD', '2003-01'), 31.7844)
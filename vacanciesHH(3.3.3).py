@@ -1,23 +1,165 @@
-import requests
-from pandas import json_normalize
-
-urls = []
-urls += [
-    f'https://api.hh.ru/vacancies?specialization=1&per_page=100&page={page}&date_from=2022-12-25T00:00:00&date_to=2022-12-25T08:00:00'
-    for page in range(20)]
-urls += [
-    f'https://api.hh.ru/vacancies?specialization=1&per_page=100&page={page}&date_from=2022-12-25T08:00:00&date_to=2022-12-25T16:00:00'
-    for page in range(20)]
-urls += [
-    f'https://api.hh.ru/vacancies?specialization=1&per_page=100&page={page}&date_from=2022-12-25T16:00:00&date_to=2022-12-26T00:00:00'
-    for page in range(20)]
-
-vacancies = []
-for url in urls:
-    vacancy = requests.get(url).json()
-    vacancies.extend(vacancy["items"])
-
-dataFrame = json_normalize(vacancies)
-vacanciesHH = dataFrame[["name", "salary.from", "salary.to", "salary.currency", "area.name", "published_at"]]
-vacanciesHH.columns = vacanciesHH.columns.str.replace(".", "_", regex=True)
-vacanciesHH.to_csv("vacanciesHH_2022-12-25.csv", index=False, encoding='utf-8-sig')
\ No newline at end of file
+import asyncio
+import csv
+import sys
+from datetime import datetime, timedelta
+
+import aiohttp
+
+
+class VacanciesFetcher:
+    """Асинхронно выгружает вакансии HH.ru за период в CSV-файл.
+
+    Запросы идут через одну сессию aiohttp с пулом соединений, одновременно - не больше limit запросов,
+    при ошибках запрос повторяется. API отдает по страницам не больше max_items вакансий одного запроса,
+    поэтому период, в котором вакансий больше, делится пополам, пока вакансии не поместятся.
+    Строки записываются в CSV по мере получения страниц, в памяти хранятся только id уже записанных вакансий.
+
+    Attributes:
+        url (str): адрес api.hh.ru/vacancies
+        params (dict): дополнительные параметры запроса
+        per_page (int): количество вакансий на странице
+        max_items (int): сколько вакансий одного запроса можно получить по страницам
+        limit (int): максимальное количество одновременных запросов
+        retries (int): количество повторов запроса при ошибке
+        backoff (float): пауза перед первым повтором в секундах, дальше удваивается
+        min_window (timedelta): период, который уже не делится
+        requests_count (int): количество запросов, отправленных для последнего файла
+        rows_count (int): количество вакансий, записанных в последний файл
+        ids (set): id вакансий, записанных в последний файл
+    """
+    headings = ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
+    date_format = '%Y-%m-%dT%H:%M:%S'
+    retry_statuses = {429}
+
+    def __init__(self, url="https://api.hh.ru/vacancies", params=None, per_page=100, max_items=2000, limit=10,
+                 retries=3, backoff=0.5, min_window=timedelta(seconds=1)):
+        """Инициализирует объект VacanciesFetcher.
+        """
+        self.url = url
+        self.params = {'specialization': 1} if params is None else params
+        self.per_page = per_page
+        self.max_items = max_items
+        self.limit = limit
+        self.retries = retries
+        self.backoff = backoff
+        self.min_window = min_window
+        self.requests_count = 0
+        self.rows_count = 0
+        self.ids = set()
+
+    async def fetch_page(self, session, semaphore, date_from, date_to, page):
+        """Возвращает страницу вакансий за период, с повторами при ошибках соединения, ответах 5xx и 429.
+        Остальные ошибки 4xx (например, 400 при запросе страницы за пределами max_items) сразу пробрасываются.
+
+        :param session: сессия aiohttp
+        :param semaphore: семафор, ограничивающий количество одновременных запросов
+        :param date_from: начало периода
+        :param date_to: конец периода (не включается)
+        :param page: номер страницы
+        :return: dict: ответ API (items, found, pages)
+        """
+        params = dict(self.params, per_page=self.per_page, page=page, date_from=date_from.strftime(self.date_format),
+                      date_to=date_to.strftime(self.date_format))
+        for attempt in range(self.retries + 1):
+            try:
+                async with semaphore:
+                    self.requests_count += 1
+                    async with session.get(self.url, params=params) as response:
+                        response.raise_for_status()
+                        return await response.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                if attempt == self.retries or (isinstance(error, aiohttp.ClientResponseError) and error.status < 500
+                                               and error.status not in VacanciesFetcher.retry_statuses):
+                    raise
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def fetch_window(self, session, semaphore, writer, date_from, date_to):
+        """Записывает вакансии за период: если по первой странице видно, что вакансий больше max_items,
+        период делится пополам, иначе остальные страницы загружаются одновременно.
+
+        :param session: сессия aiohttp
+        :param semaphore: семафор, ограничивающий количество одновременных запросов
+        :param writer: csv.writer итогового файла
+        :param date_from: начало периода
+        :param date_to: конец периода (не включается)
+        """
+        first_page = await self.fetch_page(session, semaphore, date_from, date_to, 0)
+        if first_page['found'] > self.max_items and date_to - date_from > self.min_window:
+            middle = date_from + (date_to - date_from) / 2
+            middle = max(middle.replace(microsecond=0), date_from + timedelta(seconds=1))
+            await asyncio.gather(self.fetch_window(session, semaphore, writer, date_from, middle),
+                                 self.fetch_window(session, semaphore, writer, middle, date_to))
+            return
+        if first_page['found'] > self.max_items:
+            print(f"{date_from}: вакансий {first_page['found']}, загружено только {self.max_items}")
+        self.write_items(writer, first_page['items'])
+        pages = min(first_page['pages'], self.max_items // self.per_page)
+
+        async def fetch_and_write(page):
+            self.write_items(writer, (await self.fetch_page(session, semaphore, date_from, date_to, page))['items'])
+
+        await asyncio.gather(*(fetch_and_write(page) for page in range(1, pages)))
+
+    def write_items(self, writer, items):
+        """Записывает вакансии страницы, пропуская уже записанные.
+
+        :param writer: csv.writer итогового файла
+        :param items: вакансии в формате API
+        """
+        for item in items:
+            if item['id'] in self.ids:
+                continue
+            self.ids.add(item['id'])
+            writer.writerow(VacanciesFetcher.get_row(item))
+            self.rows_count += 1
+
+    @staticmethod
+    def get_row(item):
+        """Преобразует вакансию в строку CSV, как json_normalize с колонками name, salary.from, salary.to,
+        salary.currency, area.name, published_at.
+
+        :param item: вакансия в формате API
+        :return: list: значения колонок, пустая строка - нет значения
+        """
+        salary = item.get('salary') or {}
+        return [item['name'],
+                '' if salary.get('from') is None else float(salary['from']),
+                '' if salary.get('to') is None else float(salary['to']),
+                salary.get('currency') or '', (item.get('area') or {}).get('name', ''), item['published_at']]
+
+    async def fetch_all(self, writer, date_from, date_to):
+        """Записывает все вакансии за период.
+
+        :param writer: csv.writer итогового файла
+        :param date_from: начало периода
+        :param date_to: конец периода (не включается)
+        """
+        semaphore = asyncio.Semaphore(self.limit)
+        connector = aiohttp.TCPConnector(limit=self.limit)
+        async with aiohttp.ClientSession(connector=connector, headers={'User-Agent': 'vacancies-analytics'}) as session:
+            await self.fetch_window(session, semaphore, writer, date_from, date_to)
+
+    def make_csv(self, file_name, date_from, date_to):
+        """Создает CSV-файл с вакансиями за период. Счетчики и id записанных вакансий сбрасываются,
+        поэтому один объект можно использовать для нескольких файлов.
+
+        :param file_name: название файла
+        :param date_from: начало периода
+        :param date_to: конец периода (не включается)
+        :return: int: количество вакансий
+        """
+        self.requests_count = 0
+        self.rows_count = 0
+        self.ids = set()
+        with open(file_name, mode='w', newline='', encoding='utf-8-sig') as file:
+            writer = csv.writer(file, lineterminator='\n')
+            writer.writerow(VacanciesFetcher.headings)
+            asyncio.run(self.fetch_all(writer, date_from, date_to))
+        return self.rows_count
+
+
+if __name__ == '__main__':
+    day = datetime.strptime(sys.argv[1], '%Y-%m-%d') if len(sys.argv) > 1 else datetime(2022, 12, 25)
+    fetcher = VacanciesFetcher()
+    count = fetcher.make_csv(f"vacanciesHH_{day.strftime('%Y-%m-%d')}.csv", day, day + timedelta(days=1))
+    print(f"Вакансий: {count}, запросов: {fetcher.requests_count}")
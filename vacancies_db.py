@@ -0,0 +1,310 @@
+import csv
+import os
+import sqlite3
+import sys
+
+from columns_cache import ColumnsCache
+from main import DataSet, VacancyStatistics, currency_to_rub
+
+
+class VacanciesDB:
+    """База SQLite с вакансиями, по которой статистика для отчетов считается запросами GROUP BY внутри SQLite.
+
+    Регионы и валюты вынесены в отдельные таблицы area и currency. В таблице vacancies хранится зарплата в рублях
+    (salary), год публикации (year) и название в нижнем регистре для поиска профессии (name_lower),
+    по year и area_id построены индексы. Поиск профессии - поиск подстроки, обычный индекс для него не подходит,
+    поэтому name_lower проиндексирован полнотекстовой таблицей FTS5 с токенизатором trigram (vacancies_fts):
+    она отбирает строки-кандидаты, а точное условие instr проверяется только для них.
+    Загруженные файлы хранятся в таблице source: полный путь, ключ содержимого (как у ColumnsCache) и вид файла
+    (исходный или после convert_currencies(3.4.1).py). Повторная загрузка того же файла пропускается,
+    а строки измененного файла заменяются новыми. Исходные и конвертированные файлы в одной базе не смешиваются.
+
+    Attributes:
+        file_name (str): название файла базы
+    """
+    def __init__(self, file_name):
+        """Инициализирует объект VacanciesDB.
+
+        :param file_name: название файла базы
+        """
+        self.file_name = file_name
+
+    def connect(self):
+        """Открывает соединение с базой.
+
+        :return: sqlite3.Connection
+        """
+        return sqlite3.connect(self.file_name)
+
+    def create_tables(self, connection):
+        """Создает таблицы и индексы, если их еще нет.
+
+        :param connection: соединение с базой
+        """
+        connection.executescript('''
+            CREATE TABLE IF NOT EXISTS area (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+            CREATE TABLE IF NOT EXISTS currency (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+            CREATE TABLE IF NOT EXISTS vacancies (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                name_lower TEXT NOT NULL,
+                salary_from REAL,
+                salary_to REAL,
+                currency_id INTEGER REFERENCES currency (id),
+                salary REAL,
+                area_id INTEGER NOT NULL REFERENCES area (id),
+                published_at TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                source_id INTEGER REFERENCES source (id)
+            );
+            CREATE INDEX IF NOT EXISTS vacancies_year ON vacancies (year);
+            CREATE INDEX IF NOT EXISTS vacancies_area ON vacancies (area_id);
+            DROP INDEX IF EXISTS vacancies_name;
+        ''')
+        if 'key' not in [row[1] for row in connection.execute('PRAGMA table_info(source)')]:
+            connection.execute('DROP TABLE IF EXISTS source')
+            connection.execute('CREATE TABLE source (id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, key TEXT NOT NULL, '
+                               'converted INTEGER NOT NULL)')
+        if 'source_id' not in [row[1] for row in connection.execute('PRAGMA table_info(vacancies)')]:
+            connection.execute('ALTER TABLE vacancies ADD COLUMN source_id INTEGER REFERENCES source (id)')
+        connection.execute('CREATE INDEX IF NOT EXISTS vacancies_source ON vacancies (source_id)')
+        if connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'vacancies_fts'").fetchone() is None:
+            connection.execute("CREATE VIRTUAL TABLE vacancies_fts USING fts5(name_lower, content='vacancies', "
+                               "content_rowid='id', tokenize='trigram case_sensitive 1')")
+            connection.execute("INSERT INTO vacancies_fts (vacancies_fts) VALUES ('rebuild')")
+
+    @staticmethod
+    def get_id(connection, table, name, ids):
+        """Возвращает id региона или валюты, добавляя его в таблицу при первом появлении.
+
+        :param connection: соединение с базой
+        :param table: area или currency
+        :param name: название
+        :param ids: словарь уже известных id
+        :return: int: id или None для пустого названия
+        """
+        if name is None:
+            return None
+        if name not in ids:
+            connection.execute(f'INSERT OR IGNORE INTO {table} (name) VALUES (?)', (name,))
+            ids[name] = connection.execute(f'SELECT id FROM {table} WHERE name = ?', (name,)).fetchone()[0]
+        return ids[name]
+
+    @staticmethod
+    def is_converted_file(csv_file_name):
+        """Проверяет, что CSV-файл создан convert_currencies(3.4.1).py (есть колонка salary).
+
+        :param csv_file_name: название CSV-файла
+        :return: bool
+        """
+        with open(csv_file_name, mode='r', encoding='utf-8-sig') as file:
+            return 'salary' in next(csv.reader(file))
+
+    def is_converted(self):
+        """Проверяет, что база загружена из файлов после convert_currencies(3.4.1).py.
+        В такой базе у части вакансий нет зарплаты, и статистика main.py (get_statistics) по ней не считается.
+
+        :return: bool
+        """
+        with self.connect() as connection:
+            if connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'source'").fetchone() is None:
+                return False
+            columns = [row[1] for row in connection.execute('PRAGMA table_info(source)')]
+            return 'converted' in columns and connection.execute(
+                'SELECT COUNT(*) FROM source WHERE converted').fetchone()[0] > 0
+
+    @staticmethod
+    def get_rows(csv_file_name):
+        """Читает вакансии из CSV-файла.
+        Файл с колонками salary_from, salary_to, salary_currency читается так же, как DataSet.get_dataset
+        (с фильтрацией и очисткой строк), зарплата переводится в рубли как в InputConnect.get_right_course.
+        Файл с колонкой salary (после convert_currencies(3.4.1).py) читается без фильтрации, как в 3.4.2.py и 3.4.3.py,
+        нечисловая зарплата сохраняется как NULL.
+
+        :param csv_file_name: название CSV-файла
+        :return: generator: кортежи (name, salary_from, salary_to, currency, salary, area_name, published_at)
+        """
+        if not VacanciesDB.is_converted_file(csv_file_name):
+            for row in DataSet.csv_rows(csv_file_name):
+                salary_from, salary_to = float(row['salary_from']), float(row['salary_to'])
+                rate = currency_to_rub[row['salary_currency']]
+                yield (row['name'], salary_from, salary_to, row['salary_currency'],
+                       int((salary_from * rate + salary_to * rate) / 2), row['area_name'], row['published_at'])
+            return
+        with open(csv_file_name, mode='r', encoding='utf-8-sig') as file:
+            reader = csv.reader(file)
+            headings = next(reader)
+            for line in reader:
+                if len(line) != len(headings):
+                    continue
+                row = dict(zip(headings, line))
+                try:
+                    salary = float(row['salary'])
+                except ValueError:
+                    salary = None
+                yield row['name'], None, None, None, salary, row['area_name'], row['published_at']
+
+    def load_csv(self, csv_file_name, batch_size=50000):
+        """Загружает вакансии из CSV-файла в базу одной транзакцией.
+        Файл определяется полным путем: если он уже загружен и не изменился (ключ ColumnsCache.get_source_key),
+        загрузка пропускается, а если изменился - его прежние строки удаляются и загружаются заново
+        (в конец базы, после строк других файлов).
+
+        :param csv_file_name: название CSV-файла
+        :param batch_size: количество строк в одной вставке
+        :return: bool: False, если файл уже был загружен и не изменился
+        """
+        path = os.path.realpath(csv_file_name)
+        key = ColumnsCache(csv_file_name).get_source_key()
+        converted = VacanciesDB.is_converted_file(csv_file_name)
+        with self.connect() as connection:
+            self.create_tables(connection)
+            if connection.execute('SELECT 1 FROM source WHERE converted != ?', (converted,)).fetchone() is not None:
+                raise ValueError(f"В базе {self.file_name} {'исходные' if converted else 'конвертированные'} файлы, "
+                                 f"{csv_file_name} - {'конвертированный' if converted else 'исходный'}")
+            source = connection.execute('SELECT id, key FROM source WHERE path = ?', (path,)).fetchone()
+            if source is not None and source[1] == key:
+                return False
+            if source is None:
+                source_id = connection.execute('INSERT INTO source (path, key, converted) VALUES (?, ?, ?)',
+                                               (path, key, converted)).lastrowid
+            else:
+                source_id = source[0]
+                connection.execute("INSERT INTO vacancies_fts (vacancies_fts, rowid, name_lower) "
+                                   "SELECT 'delete', id, name_lower FROM vacancies WHERE source_id = ?", (source_id,))
+                connection.execute('DELETE FROM vacancies WHERE source_id = ?', (source_id,))
+                connection.execute('UPDATE source SET key = ? WHERE id = ?', (key, source_id))
+            last_id = connection.execute('SELECT COALESCE(MAX(id), 0) FROM vacancies').fetchone()[0]
+            area_ids = dict()
+            currency_ids = dict()
+            batch = []
+            for name, salary_from, salary_to, currency, salary, area_name, published_at in VacanciesDB.get_rows(csv_file_name):
+                batch.append((name, name.lower(), salary_from, salary_to,
+                              VacanciesDB.get_id(connection, 'currency', currency, currency_ids), salary,
+                              VacanciesDB.get_id(connection, 'area', area_name, area_ids), published_at,
+                              int(published_at[:4]), source_id))
+                if len(batch) == batch_size:
+                    VacanciesDB.insert(connection, batch)
+                    batch = []
+            VacanciesDB.insert(connection, batch)
+            connection.execute('INSERT INTO vacancies_fts (rowid, name_lower) SELECT id, name_lower FROM vacancies '
+                               'WHERE id > ?', (last_id,))
+        return True
+
+    @staticmethod
+    def insert(connection, batch):
+        """Вставляет строки в таблицу vacancies.
+
+        :param connection: соединение с базой
+        :param batch: список строк
+        """
+        connection.executemany('INSERT INTO vacancies (name, name_lower, salary_from, salary_to, currency_id, salary, '
+                               'area_id, published_at, year, source_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', batch)
+
+    @staticmethod
+    def get_name_filter(column, profession):
+        """Условие поиска профессии в названии: кандидаты отбираются по индексу vacancies_fts,
+        точное совпадение проверяется instr. Триграммный индекс не ищет строки короче трех символов,
+        для них остается только instr.
+
+        :param column: name (с учетом регистра) или name_lower
+        :param profession: название профессии в регистре, который ищется в column
+        :return: условие WHERE для таблицы vacancies и его параметры
+        """
+        condition = f'instr(vacancies.{column}, ?) > 0'
+        if len(profession) < 3:
+            return condition, (profession,)
+        phrase = '"' + profession.lower().replace('"', '""') + '"'
+        return (f'vacancies.id IN (SELECT rowid FROM vacancies_fts WHERE vacancies_fts MATCH ?) AND {condition}',
+                (phrase, profession))
+
+    def get_statistics(self, profession):
+        """Заполняет накопители VacancyStatistics запросами к базе, загруженной из файла с salary_from и salary_to.
+        Порядок годов и городов - порядок первого появления в файле, как у InputConnect.print.
+        Для базы из конвертированных файлов (is_converted) статистика не считается.
+
+        :param profession: название профессии (с учетом регистра, как в InputConnect)
+        :return: объект класса VacancyStatistics
+        """
+        if self.is_converted():
+            raise ValueError(f"База {self.file_name} загружена из конвертированных файлов, статистика main.py по ней не считается")
+        statistics = VacancyStatistics(profession)
+        with self.connect() as connection:
+            statistics.count_vacancies = connection.execute('SELECT COUNT(*) FROM vacancies').fetchone()[0]
+            for year, count, salary in connection.execute(
+                    'SELECT year, COUNT(*), SUM(salary) FROM vacancies GROUP BY year ORDER BY MIN(id)'):
+                statistics.count_by_year[year] = count
+                statistics.salary_by_year[year] = int(salary)
+            condition, parameters = VacanciesDB.get_name_filter('name', profession)
+            for year, count, salary in connection.execute(
+                    f'SELECT year, COUNT(*), SUM(salary) FROM vacancies WHERE {condition} '
+                    'GROUP BY year ORDER BY MIN(id)', parameters):
+                statistics.count_by_profession[year] = count
+                statistics.salary_by_profession[year] = int(salary)
+            for area, count, salary in connection.execute(
+                    'SELECT area.name, COUNT(*), SUM(salary) FROM vacancies JOIN area ON area.id = area_id '
+                    'GROUP BY area_id ORDER BY MIN(vacancies.id)'):
+                statistics.count_by_cities[area] = count
+                statistics.salary_by_cities[area] = int(salary)
+        return statistics
+
+    def get_year_statistics(self, profession):
+        """Статистика по годам, как у Report.get_data в 3.4.2.py (профессия ищется без учета регистра).
+
+        :param profession: название профессии
+        :return: salary_vacansies, count_vacansies, salary_profession, count_profession: словари, где ключ - год (str)
+        """
+        salary_vacansies, count_vacansies, salary_profession, count_profession = {}, {}, {}, {}
+        condition, parameters = VacanciesDB.get_name_filter('name_lower', profession.lower())
+        with self.connect() as connection:
+            for year, salary, count in connection.execute(
+                    'SELECT year, AVG(salary), COUNT(*) FROM vacancies GROUP BY year ORDER BY year'):
+                salary_vacansies[str(year)] = 0 if salary is None else round(salary)
+                count_vacansies[str(year)] = count
+                salary_profession[str(year)] = 0
+                count_profession[str(year)] = 0
+            for year, salary, count in connection.execute(
+                    f'SELECT year, AVG(salary), COUNT(*) FROM vacancies WHERE {condition} GROUP BY year', parameters):
+                salary_profession[str(year)] = 0 if salary is None else round(salary)
+                count_profession[str(year)] = count
+        return salary_vacansies, count_vacansies, salary_profession, count_profession
+
+    def get_area_statistics(self, profession, area_name):
+        """Статистика профессии в регионе по годам, как у Report.get_data_area в 3.4.3.py.
+
+        :param profession: название профессии
+        :param area_name: название региона
+        :return: salary_profession, count_profession: словари, где ключ - год (str)
+        """
+        salary_profession, count_profession = {}, {}
+        condition, parameters = VacanciesDB.get_name_filter('name_lower', profession.lower())
+        with self.connect() as connection:
+            for year, salary, count in connection.execute(
+                    'SELECT year, AVG(salary), COUNT(*) FROM vacancies JOIN area ON area.id = area_id '
+                    f'WHERE area.name = ? AND {condition} GROUP BY year ORDER BY year', (area_name,) + parameters):
+                salary_profession[str(year)] = 0 if salary is None else round(salary)
+                count_profession[str(year)] = count
+        return salary_profession, count_profession
+
+    def get_areas_statistics(self):
+        """Статистика по городам, как у Report.get_data_areas в 3.4.3.py.
+
+        :return: salary_area_dict, top_area_proportion: словари с топ 10 городов по зарплате и по доле вакансий
+        """
+        with self.connect() as connection:
+            total = connection.execute('SELECT COUNT(*) FROM vacancies').fetchone()[0]
+            areas = connection.execute(
+                'SELECT area.name, COUNT(*), AVG(salary) FROM vacancies JOIN area ON area.id = area_id '
+                'GROUP BY area_id ORDER BY COUNT(*) DESC, MIN(vacancies.id)').fetchall()
+        area_proportion = {area: round(count / total, 4) for area, count, salary in areas if round(count / total, 4) > 0.01}
+        top_area_proportion = dict(list(area_proportion.items())[:10])
+        salary_by_area = {area: round(salary) for area, count, salary in sorted(areas)
+                          if area in area_proportion and salary is not None}
+        salary_area_dict = dict(sorted(salary_by_area.items(), key=lambda x: x[-1], reverse=True)[:10])
+        return salary_area_dict, top_area_proportion
+
+
+if __name__ == '__main__':
+    csv_file_name = sys.argv[1] if len(sys.argv) > 1 else 'vacancies_by_year.csv'
+    db_file_name = sys.argv[2] if len(sys.argv) > 2 else 'vacancies.db'
+    VacanciesDB(db_file_name).load_csv(csv_file_name)
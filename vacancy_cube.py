@@ -0,0 +1,468 @@
+import csv
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from columns_cache import ColumnsCache
+from currency_rates import CurrencyRates
+from main import DataSet, VacancyStatistics
+from name_index import ProfessionMatcher
+
+
+class VacancyCube:
+    """Агрегатный куб вакансий по измерениям год × регион × валюта, который строится один раз и сохраняется в файл .npz.
+    Отчеты main.py, 3.4.2.py и 3.4.3.py - разные срезы одних и тех же сумм и количеств, поэтому они считаются
+    по кубу без чтения вакансий, и время отчета не зависит от количества вакансий.
+
+    В каждой непустой ячейке хранятся показатели: количество вакансий, количество зарплат, сумма, минимум и максимум
+    зарплат и номер первой вакансии ячейки (по нему восстанавливается порядок первого появления, как в main.py).
+    Слой 0 - все вакансии, затем для каждой профессии из заданного списка два слоя: название содержит профессию
+    с учетом регистра (как в main.py) и без учета регистра (как в 3.4.2.py и 3.4.3.py).
+
+    Методы запросов называются так же, как у VacanciesDB, поэтому скрипты принимают файл куба вместо базы SQLite.
+
+    Новые вакансии (например, ежедневный файл vacanciesHH(3.3.3).py) добавляются в сохраненный куб методом ingest:
+    по новому файлу строится свой куб, который складывается с сохраненным, поэтому обновление стоит столько же,
+    сколько обработка нового файла, а результат совпадает с построением куба по всем файлам подряд.
+    Складываются только кубы, построенные одинаково: по исходным или по конвертированным файлам
+    и с одним способом перевода зарплат в рубли.
+
+    Attributes:
+        years (list): годы (int), индекс в списке - код года
+        areas (list): регионы, индекс в списке - код региона
+        currencies (list): валюты, индекс в списке - код валюты
+        professions (list): профессии, для которых построены слои
+        cells (np.ndarray): координаты непустых ячеек (код года, код региона, код валюты), int32, форма (ячейки, 3)
+        layers (np.ndarray): показатели ячеек, float64, форма (1 + 2 * профессии, ячейки, 6)
+        sources (list): файлы, по которым построен куб, в порядке добавления - пары (полный путь,
+            ключ содержимого ColumnsCache.get_source_key)
+        historical_rates (bool): зарплаты переведены в рубли по курсу месяца публикации (CurrencyRates),
+            а не по фиксированному курсу
+        converted (bool): куб построен по файлу с колонкой salary (после convert_currencies(3.4.1).py)
+    """
+    dimensions = ('year', 'area_name', 'currency')
+    measures = ('count', 'salary_count', 'salary_sum', 'salary_min', 'salary_max', 'first')
+
+    def __init__(self, years, areas, currencies, professions, cells, layers, sources=None, historical_rates=False,
+                 converted=False):
+        """Инициализирует объект VacancyCube.
+        """
+        self.years = years
+        self.areas = areas
+        self.currencies = currencies
+        self.professions = professions
+        self.cells = cells
+        self.layers = layers
+        self.sources = sources or []
+        self.historical_rates = historical_rates
+        self.converted = converted
+
+    @staticmethod
+    def from_csv(file_name, professions, currency_rates=None):
+        """Строит куб по CSV-файлу.
+        Файл с колонками salary_from, salary_to, salary_currency читается так же, как DataSet.get_dataset
+        (с фильтрацией и очисткой строк), зарплата переводится в рубли как в VacancyColumns.get_salaries.
+        Файл с колонкой salary (после convert_currencies(3.4.1).py) читается так же, как в 3.4.2.py и 3.4.3.py.
+
+        :param file_name: название CSV-файла
+        :param professions: профессии, для которых строятся слои
+        :param currency_rates: объект класса CurrencyRates для пересчета по курсу месяца публикации
+        :return: объект класса VacancyCube
+        """
+        with open(file_name, mode='r', encoding='utf-8-sig') as file:
+            headings = next(csv.reader(file))
+        if 'salary' not in headings:
+            cube = VacancyCube.from_columns(DataSet.get_dataset(file_name).columns, professions, currency_rates)
+        else:
+            cube = VacancyCube.from_frame(pd.read_csv(file_name), professions)
+        cube.sources = [VacancyCube.get_source(file_name)]
+        return cube
+
+    @staticmethod
+    def from_columns(columns, professions, currency_rates=None):
+        """Строит куб по колонкам VacancyColumns.
+
+        :param columns: объект класса VacancyColumns
+        :param professions: профессии, для которых строятся слои
+        :param currency_rates: объект класса CurrencyRates для пересчета по курсу месяца публикации
+        :return: объект класса VacancyCube
+        """
+        unique_years, year = np.unique(columns.year, return_inverse=True)
+        cube = VacancyCube.build(unique_years.tolist(), year, list(columns.areas), columns.area,
+                                 list(columns.currencies), columns.currency,
+                                 columns.get_salaries(currency_rates).astype(np.float64), columns.names, professions)
+        cube.historical_rates = currency_rates is not None
+        return cube
+
+    @staticmethod
+    def from_frame(data, professions):
+        """Строит куб по DataFrame с колонками name, salary, area_name, published_at (и, если есть, salary_currency;
+        без нее все зарплаты считаются рублевыми). Вакансии без названия, региона или даты публикации пропускаются.
+
+        :param data: DataFrame
+        :param professions: профессии, для которых строятся слои
+        :return: объект класса VacancyCube
+        """
+        data = data.dropna(subset=['name', 'area_name', 'published_at'])
+        unique_years, year = np.unique(data['published_at'].str[:4].astype(int).to_numpy(), return_inverse=True)
+        areas, area = np.unique(data['area_name'].to_numpy(dtype=str), return_inverse=True)
+        if 'salary_currency' in data:
+            currencies, currency = np.unique(data['salary_currency'].fillna('').to_numpy(dtype=str), return_inverse=True)
+        else:
+            currencies, currency = np.array(['RUR']), np.zeros(len(data), dtype=np.int64)
+        cube = VacancyCube.build(unique_years.tolist(), year, areas.tolist(), area, currencies.tolist(), currency,
+                                 data['salary'].to_numpy(dtype=np.float64), data['name'].tolist(), professions)
+        cube.converted = True
+        return cube
+
+    @staticmethod
+    def build(years, year, areas, area, currencies, currency, salaries, names, professions):
+        """Строит куб по закодированным колонкам вакансий.
+
+        :param years: годы, индекс - код года
+        :param year: массив кодов годов
+        :param areas: регионы, индекс - код региона
+        :param area: массив кодов регионов
+        :param currencies: валюты, индекс - код валюты
+        :param currency: массив кодов валют
+        :param salaries: массив зарплат в рублях (NaN - нет зарплаты)
+        :param names: названия вакансий
+        :param professions: профессии, для которых строятся слои
+        :return: объект класса VacancyCube
+        """
+        professions = list(dict.fromkeys(professions))
+        keys = (np.asarray(year, dtype=np.int64) * len(areas) + area) * len(currencies) + currency
+        unique_keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        order = np.argsort(first, kind='stable')
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        inverse = rank[inverse.reshape(-1)]
+        unique_keys = unique_keys[order]
+        cells = np.stack([unique_keys // len(currencies) // len(areas), unique_keys // len(currencies) % len(areas),
+                          unique_keys % len(currencies)], axis=1).astype(np.int32)
+        case_masks = ProfessionMatcher(professions).get_masks(names) if professions else {}
+        lower_masks = ProfessionMatcher(professions, case=False).get_masks(names) if professions else {}
+        layers = [VacancyCube.get_layer(inverse, len(cells), salaries)]
+        for profession in professions:
+            layers.append(VacancyCube.get_layer(inverse, len(cells), salaries, case_masks[profession]))
+            layers.append(VacancyCube.get_layer(inverse, len(cells), salaries, lower_masks[profession]))
+        return VacancyCube(years, areas, currencies, professions, cells, np.stack(layers))
+
+    @staticmethod
+    def get_layer(inverse, size, salaries, mask=None):
+        """Считает показатели ячеек по вакансиям.
+
+        :param inverse: массив номеров ячеек вакансий
+        :param size: количество ячеек
+        :param salaries: массив зарплат (NaN - нет зарплаты)
+        :param mask: булев массив отобранных вакансий (None - все вакансии)
+        :return: np.ndarray: показатели, форма (size, 6)
+        """
+        rows = np.arange(len(inverse)) if mask is None else np.flatnonzero(mask)
+        cell, salary = inverse[rows], salaries[rows]
+        return VacancyCube.reduce(cell, size, np.ones(len(rows)), (~np.isnan(salary)).astype(np.float64),
+                                  np.nan_to_num(salary), salary, salary, rows.astype(np.float64))
+
+    @staticmethod
+    def reduce(codes, size, counts, salary_counts, salary_sums, salary_mins, salary_maxs, firsts):
+        """Складывает показатели с одинаковыми кодами.
+
+        :param codes: массив кодов (ячеек или значений измерения)
+        :param size: количество кодов
+        :return: np.ndarray: показатели, форма (size, 6)
+        """
+        result = np.empty((size, len(VacancyCube.measures)), dtype=np.float64)
+        result[:, 0] = np.bincount(codes, weights=counts, minlength=size)
+        result[:, 1] = np.bincount(codes, weights=salary_counts, minlength=size)
+        result[:, 2] = np.bincount(codes, weights=salary_sums, minlength=size)
+        for column, ufunc, start, values in ((3, np.fmin, np.nan, salary_mins), (4, np.fmax, np.nan, salary_maxs),
+                                             (5, np.minimum, np.inf, firsts)):
+            accumulator = np.full(size, start)
+            ufunc.at(accumulator, codes, values)
+            result[:, column] = accumulator
+        return result
+
+    def get_mode(self):
+        """Описывает, как построен куб: по каким файлам и как зарплаты переведены в рубли.
+
+        :return: str
+        """
+        if self.converted:
+            return "файл после convert_currencies(3.4.1).py"
+        return f"исходный файл, {'курс месяца публикации' if self.historical_rates else 'фиксированный курс'}"
+
+    def merge(self, other):
+        """Добавляет вакансии другого куба, построенного для тех же профессий и так же (get_mode).
+        Вакансии other считаются идущими после вакансий этого куба: номера первых вакансий ячеек other
+        сдвигаются на количество вакансий этого куба, поэтому порядок первого появления совпадает
+        с порядком при построении куба по обоим файлам подряд.
+
+        :param other: объект класса VacancyCube
+        :return: этот же объект
+        """
+        if other.professions != self.professions:
+            raise ValueError(f"Профессии кубов различаются: {', '.join(self.professions)} и {', '.join(other.professions)}")
+        if (other.converted, other.historical_rates) != (self.converted, self.historical_rates):
+            raise ValueError(f"Кубы построены по-разному: {self.get_mode()} и {other.get_mode()}")
+        repeated = dict(self.sources).keys() & dict(other.sources).keys()
+        if repeated:
+            raise ValueError(f"Файлы уже есть в кубе: {', '.join(sorted(repeated))}")
+        codes = []
+        for dimension in VacancyCube.dimensions:
+            labels, other_labels = self.get_labels(dimension), other.get_labels(dimension)
+            known = {label: code for code, label in enumerate(labels)}
+            labels += [label for label in other_labels if label not in known]
+            known = {label: code for code, label in enumerate(labels)}
+            codes.append(np.array([known[label] for label in other_labels], dtype=np.int64).reshape(-1))
+        other_cells = np.stack([code[other.cells[:, axis]] for axis, code in enumerate(codes)], axis=1)
+        cells = np.concatenate([self.cells.astype(np.int64), other_cells])
+        keys = (cells[:, 0] * len(self.areas) + cells[:, 1]) * len(self.currencies) + cells[:, 2]
+        unique_keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        order = np.argsort(first, kind='stable')
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        inverse = rank[inverse.reshape(-1)]
+        other_layers = other.layers.copy()
+        other_layers[:, :, 5] += self.layers[0, :, 0].sum()
+        layers = np.concatenate([self.layers, other_layers], axis=1)
+        self.layers = np.stack([VacancyCube.reduce(inverse, len(order), *layer.T) for layer in layers])
+        self.cells = cells[first[order]].astype(np.int32)
+        self.sources = self.sources + other.sources
+        return self
+
+    @staticmethod
+    def get_source(file_name):
+        """Описывает файл для sources: полный путь и ключ содержимого (размер, время изменения и хэш начала и конца).
+
+        :param file_name: название CSV-файла
+        :return: tuple: (путь, ключ)
+        """
+        return os.path.realpath(file_name), ColumnsCache(file_name).get_source_key()
+
+    @staticmethod
+    def ingest(file_name, csv_file_name, currency_rates=None):
+        """Добавляет в сохраненный куб вакансии нового файла и сохраняет куб. Файл, который уже есть в sources
+        с тем же содержимым, повторно не добавляется; если файл по тому же пути изменился, куб нужно построить
+        заново (ValueError), иначе он перестанет совпадать с построенным по всем файлам.
+        Новый файл должен быть того же вида (исходный или конвертированный),
+        а currency_rates - задан, только если куб построен с пересчетом по курсу месяца публикации, иначе ValueError.
+
+        :param file_name: название файла куба
+        :param csv_file_name: CSV-файл с новыми вакансиями (например, vacanciesHH_2022-12-25.csv)
+        :param currency_rates: объект класса CurrencyRates для пересчета по курсу месяца публикации
+        :return: bool: True, если вакансии добавлены
+        """
+        cube = VacancyCube.load(file_name)
+        path, key = VacancyCube.get_source(csv_file_name)
+        if (path, key) in cube.sources:
+            return False
+        if path in dict(cube.sources):
+            raise ValueError(f"Файл {csv_file_name} изменился после добавления в куб, куб нужно построить заново")
+        cube.merge(VacancyCube.from_csv(csv_file_name, cube.professions, currency_rates))
+        cube.save(file_name)
+        return True
+
+    def get_cells(self, profession=None, case=True):
+        """Возвращает показатели непустых ячеек слоя по значениям измерений (не зависит от порядка кодов).
+
+        :param profession: название профессии (None - все вакансии)
+        :param case: учитывать регистр при поиске профессии
+        :return: dict: ключ - (год, регион, валюта), значение - список показателей
+        """
+        layer = self.layers[self.get_layer_number(profession, case)]
+        return {(self.years[year], self.areas[area], self.currencies[currency]): values
+                for (year, area, currency), values in zip(self.cells.tolist(), layer.tolist()) if values[0] > 0}
+
+    def equals(self, other):
+        """Проверяет, что кубы содержат одинаковые показатели, например куб после ingest и куб,
+        построенный заново по всем файлам.
+
+        :param other: объект класса VacancyCube
+        :return: bool
+        """
+        if (other.professions, other.converted, other.historical_rates) != (
+                self.professions, self.converted, self.historical_rates):
+            return False
+        for profession, case in [(None, True)] + [(profession, case) for profession in self.professions
+                                                  for case in (True, False)]:
+            cells, other_cells = self.get_cells(profession, case), other.get_cells(profession, case)
+            if cells.keys() != other_cells.keys() or not np.array_equal(
+                    np.array(list(cells.values())).reshape(-1, len(VacancyCube.measures)),
+                    np.array([other_cells[key] for key in cells]).reshape(-1, len(VacancyCube.measures)), equal_nan=True):
+                return False
+        return True
+
+    def save(self, file_name):
+        """Сохраняет куб в файл .npz. Куб сначала пишется во временный файл, который затем переименовывается,
+        поэтому прерванная запись не портит сохраненный куб.
+
+        :param file_name: название файла куба
+        """
+        temporary = f"{file_name}.{os.getpid()}.tmp"
+        with open(temporary, mode='wb') as file:
+            np.savez(file, years=np.array(self.years, dtype=np.int64), areas=np.array(self.areas, dtype=str),
+                     currencies=np.array(self.currencies, dtype=str), professions=np.array(self.professions, dtype=str),
+                     cells=self.cells, layers=self.layers, sources=np.array(self.sources, dtype=str).reshape(-1, 2),
+                     historical_rates=np.array(self.historical_rates), converted=np.array(self.converted))
+        os.replace(temporary, file_name)
+
+    @staticmethod
+    def load(file_name):
+        """Загружает куб из файла .npz.
+
+        :param file_name: название файла куба
+        :return: объект класса VacancyCube
+        """
+        with np.load(file_name) as data:
+            return VacancyCube(data['years'].tolist(), data['areas'].tolist(), data['currencies'].tolist(),
+                               data['professions'].tolist(), data['cells'], data['layers'],
+                               VacancyCube.load_sources(data['sources']) if 'sources' in data.files else [],
+                               bool(data['historical_rates']) if 'historical_rates' in data.files else False,
+                               bool(data['converted']) if 'converted' in data.files else False)
+
+    @staticmethod
+    def load_sources(sources):
+        """Читает sources из файла .npz. В кубах, сохраненных до появления ключей, хранились только названия
+        файлов, у таких файлов ключ пустой.
+
+        :param sources: массив NumPy, форма (файлы, 2) или (файлы,)
+        :return: list: пары (путь, ключ)
+        """
+        if sources.ndim == 1:
+            return [(source, '') for source in sources.tolist()]
+        return [tuple(source) for source in sources.tolist()]
+
+    def get_layer_number(self, profession=None, case=True):
+        """Возвращает номер слоя.
+
+        :param profession: название профессии (None - все вакансии)
+        :param case: учитывать регистр при поиске профессии
+        :return: int: номер слоя
+        """
+        if profession is None:
+            return 0
+        if profession not in self.professions:
+            raise ValueError(f"Профессии {profession} нет в кубе, доступны: {', '.join(self.professions)}")
+        return 1 + 2 * self.professions.index(profession) + (not case)
+
+    def get_labels(self, dimension):
+        """Возвращает значения измерения.
+
+        :param dimension: year, area_name или currency
+        :return: list: значения, индекс - код
+        """
+        return {'year': self.years, 'area_name': self.areas, 'currency': self.currencies}[dimension]
+
+    def aggregate(self, dimension, profession=None, case=True, **filters):
+        """Сворачивает куб по одному измерению с отбором по значениям других измерений.
+
+        :param dimension: year, area_name или currency
+        :param profession: название профессии (None - все вакансии)
+        :param case: учитывать регистр при поиске профессии
+        :param filters: отбор по измерениям, например area_name='Москва', year=2022
+        :return: dict: ключ - значение измерения в порядке первого появления, значение - словарь показателей
+            (count, salary_count, salary_sum, salary_min, salary_max, first); значения без вакансий не попадают
+        """
+        layer = self.layers[self.get_layer_number(profession, case)]
+        mask = layer[:, 0] > 0
+        for name, value in filters.items():
+            labels = self.get_labels(name)
+            if value not in labels:
+                return {}
+            mask &= self.cells[:, VacancyCube.dimensions.index(name)] == labels.index(value)
+        labels = self.get_labels(dimension)
+        values = layer[mask]
+        result = VacancyCube.reduce(self.cells[mask, VacancyCube.dimensions.index(dimension)], len(labels),
+                                    *values.T)
+        present = np.flatnonzero(result[:, 0] > 0)
+        present = present[np.argsort(result[present, 5], kind='stable')]
+        return {labels[code]: dict(zip(VacancyCube.measures, result[code].tolist())) for code in present}
+
+    def get_statistics(self, profession):
+        """Заполняет накопители VacancyStatistics по кубу, как VacanciesDB.get_statistics.
+        Порядок годов и городов - порядок первого появления в файле, как у InputConnect.print.
+
+        :param profession: название профессии (с учетом регистра, как в InputConnect)
+        :return: объект класса VacancyStatistics
+        """
+        statistics = VacancyStatistics(profession)
+        statistics.count_vacancies = int(self.layers[0, :, 0].sum())
+        for counts, salaries, values in (
+                (statistics.count_by_year, statistics.salary_by_year, self.aggregate('year')),
+                (statistics.count_by_profession, statistics.salary_by_profession, self.aggregate('year', profession)),
+                (statistics.count_by_cities, statistics.salary_by_cities, self.aggregate('area_name'))):
+            for key, value in values.items():
+                counts[key] = int(value['count'])
+                salaries[key] = int(value['salary_sum'])
+        return statistics
+
+    @staticmethod
+    def get_mean(value):
+        """Средняя зарплата ячейки, как round(mean()) в 3.4.2.py и 3.4.3.py.
+
+        :param value: словарь показателей из aggregate
+        :return: int: округленная средняя зарплата (0, если зарплат нет)
+        """
+        return round(value['salary_sum'] / value['salary_count']) if value['salary_count'] else 0
+
+    def get_year_statistics(self, profession):
+        """Статистика по годам, как у Report.get_data в 3.4.2.py (профессия ищется без учета регистра).
+
+        :param profession: название профессии
+        :return: salary_vacansies, count_vacansies, salary_profession, count_profession: словари, где ключ - год (str)
+        """
+        years = sorted(self.aggregate('year').items())
+        profession_years = self.aggregate('year', profession, case=False)
+        empty = {'count': 0, 'salary_count': 0}
+        return ({str(year): VacancyCube.get_mean(value) for year, value in years},
+                {str(year): int(value['count']) for year, value in years},
+                {str(year): VacancyCube.get_mean(profession_years.get(year, empty)) for year, value in years},
+                {str(year): int(profession_years.get(year, empty)['count']) for year, value in years})
+
+    def get_area_statistics(self, profession, area_name):
+        """Статистика профессии в регионе по годам, как у Report.get_data_area в 3.4.3.py.
+
+        :param profession: название профессии
+        :param area_name: название региона
+        :return: salary_profession, count_profession: словари, где ключ - год (str)
+        """
+        years = sorted(self.aggregate('year', profession, case=False, area_name=area_name).items())
+        return ({str(year): VacancyCube.get_mean(value) for year, value in years},
+                {str(year): int(value['count']) for year, value in years})
+
+    def get_areas_statistics(self):
+        """Статистика по городам, как у Report.get_data_areas в 3.4.3.py.
+
+        :return: salary_area_dict, top_area_proportion: словари с топ 10 городов по зарплате и по доле вакансий
+        """
+        areas = self.aggregate('area_name')
+        total = sum(value['count'] for value in areas.values())
+        area_proportion = {area: round(value['count'] / total, 4) for area, value in areas.items()
+                           if round(value['count'] / total, 4) > 0.01}
+        top_area_proportion = dict(sorted(area_proportion.items(), key=lambda x: x[-1], reverse=True)[:10])
+        salary_by_area = {area: VacancyCube.get_mean(areas[area]) for area in sorted(area_proportion)
+                          if areas[area]['salary_count']}
+        salary_area_dict = dict(sorted(salary_by_area.items(), key=lambda x: x[-1], reverse=True)[:10])
+        return salary_area_dict, top_area_proportion
+
+
+if __name__ == '__main__':
+    arguments = [argument for argument in sys.argv[1:] if argument != '--rates']
+    currency_rates = CurrencyRates.from_csv('currency_2003-2022.csv') if '--rates' in sys.argv else None
+    if arguments and arguments[0] == 'ingest':
+        cube_file_name = arguments[1]
+        for csv_file_name in arguments[2:]:
+            added = VacancyCube.ingest(cube_file_name, csv_file_name, currency_rates)
+            print(f"{csv_file_name}: {'добавлен' if added else 'уже добавлен ранее'}")
+    elif arguments and arguments[0] == 'check':
+        cube = VacancyCube.load(arguments[1])
+        rebuilt = VacancyCube.from_csv(arguments[2], cube.professions,
+                                       CurrencyRates.from_csv('currency_2003-2022.csv') if cube.historical_rates else None)
+        print(f"Куб {'совпадает' if cube.equals(rebuilt) else 'не совпадает'} с построенным заново по {arguments[2]}")
+    else:
+        csv_file_name = arguments[0] if len(arguments) > 0 else 'vacancies_by_year.csv'
+        cube_file_name = arguments[1] if len(arguments) > 1 else 'vacancies.cube.npz'
+        professions = [profession.strip() for profession in arguments[2].split(';')] if len(arguments) > 2 else []
+        VacancyCube.from_csv(csv_file_name, professions, currency_rates).save(cube_file_name)
@@ -0,0 +1,279 @@
+import io
+import mmap
+import os
+
+import numpy as np
+import pandas as pd
+
+from main import DataSet, VacancyStatistics, currency_to_rub
+
+
+columns = ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
+dtypes = {'name': str, 'salary_from': 'float64', 'salary_to': 'float64', 'salary_currency': str, 'area_name': str,
+          'published_at': str}
+
+
+def read_vacancies(file):
+    """Читает из CSV только нужные для статистики колонки с заранее заданными типами.
+
+    :param file: название файла или файловый объект
+    :return: DataFrame с колонками name, salary_from, salary_to, salary_currency, area_name, published_at
+    """
+    return pd.read_csv(file, usecols=columns, dtype=dtypes)
+
+
+class Shards:
+    """Делит CSV-файлы каталога на части примерно одинакового размера в байтах.
+
+    Часть - тройка (название файла, начало, конец); границы частей совпадают с границами строк CSV
+    (перенос строки внутри кавычек границей не считается), поэтому части можно обрабатывать независимо.
+    """
+    @staticmethod
+    def get_shards(directory, shard_size):
+        """Делит все файлы каталога на части.
+
+        :param directory: каталог с CSV-файлами
+        :param shard_size: примерный размер части в байтах
+        :return: list: части (название файла, начало, конец), крупные файлы дают несколько частей
+        """
+        shards = []
+        for file_name in sorted(os.listdir(directory)):
+            shards += Shards.get_file_shards(os.path.join(directory, file_name), shard_size)
+        return shards
+
+    @staticmethod
+    def get_shard_size(directory, tasks):
+        """Подбирает размер части так, чтобы получилось около tasks частей.
+
+        :param directory: каталог с CSV-файлами
+        :param tasks: желаемое количество частей
+        :return: int: размер части в байтах
+        """
+        size = sum(os.path.getsize(os.path.join(directory, file_name)) for file_name in os.listdir(directory))
+        return max(1, size // max(1, tasks))
+
+    @staticmethod
+    def get_file_shards(file_name, shard_size):
+        """Делит один файл на части.
+
+        :param file_name: название файла
+        :param shard_size: примерный размер части в байтах
+        :return: list: части (название файла, начало, конец) без строки заголовков
+        """
+        shards = []
+        if os.path.getsize(file_name) == 0:
+            return shards
+        with open(file_name, mode='rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            start = content.find(b'\n') + 1 or len(content)
+            while start < len(content):
+                end = Shards.get_boundary(content, start, start + shard_size)
+                shards.append((file_name, start, end))
+                start = end
+        return shards
+
+    @staticmethod
+    def get_boundary(content, start, offset):
+        """Находит первую границу строки CSV не раньше offset.
+
+        :param content: содержимое файла (bytes или mmap)
+        :param start: начало строки CSV
+        :param offset: желаемая граница
+        :return: int: позиция сразу после переноса строки, на которой заканчивается строка CSV
+        """
+        if offset >= len(content):
+            return len(content)
+        quotes = content[start:offset].count(b'"')
+        position = offset
+        while position < len(content):
+            end = content.find(b'\n', position)
+            end = len(content) if end == -1 else end + 1
+            quotes += content[position:end].count(b'"')
+            position = end
+            if quotes % 2 == 0:
+                break
+        return position
+
+    @staticmethod
+    def read_shard(shard):
+        """Читает часть файла вместе со строкой заголовков.
+
+        :param shard: часть (название файла, начало, конец)
+        :return: DataFrame
+        """
+        file_name, start, end = shard
+        with open(file_name, mode='rb') as file:
+            header = file.readline()
+            file.seek(start)
+            content = file.read(end - start)
+        return read_vacancies(io.BytesIO(header + content))
+
+
+class YearPartials:
+    """Частичные накопители статистики по годам и по городам, посчитанные по одной части данных.
+    Накопители разных частей складываются, а средние и доли считаются только после объединения.
+
+    Статистика по городам считается как в main.py: только по строкам без пустых полей, зарплата переводится
+    в рубли по currency_to_rub и округляется вниз для каждой вакансии. Для города запоминается позиция
+    первой строки, чтобы после объединения города шли в порядке первого появления, как в VacancyStatistics.
+
+    Attributes:
+        profession (str): название профессии
+        years (dict): ключ - год (str), значение - список [количество вакансий, сумма зарплат, количество зарплат,
+            количество вакансий профессии, сумма зарплат профессии, количество зарплат профессии]
+        cities (dict): ключ - город, значение - список [количество вакансий, сумма зарплат,
+            позиция первой строки (название файла, начало части, номер строки)]
+    """
+    def __init__(self, profession):
+        """Инициализирует пустые накопители.
+
+        :param profession: название профессии
+        """
+        self.profession = profession
+        self.years = dict()
+        self.cities = dict()
+
+    @staticmethod
+    def from_frame(data, profession, position=()):
+        """Заполняет накопители по вакансиям одной части.
+
+        :param data: DataFrame с колонками name, salary_from, salary_to, salary_currency, area_name, published_at
+        :param profession: название профессии
+        :param position: начало позиции строк части (название файла, начало части)
+        :return: объект класса YearPartials
+        """
+        partials = YearPartials(profession)
+        salary = (data['salary_from'] + data['salary_to']) * 0.5
+        mask = data['name'].str.contains(profession, na=False)
+        frame = pd.DataFrame({'year': data['published_at'].str[:4], 'salary': salary,
+                              'profession': mask, 'profession_salary': salary.where(mask)})
+        groups = frame.groupby('year', sort=False).agg(
+            count=('salary', 'size'), salary_sum=('salary', 'sum'), salary_count=('salary', 'count'),
+            profession_count=('profession', 'sum'), profession_sum=('profession_salary', 'sum'),
+            profession_salary_count=('profession_salary', 'count'))
+        for year, *values in groups.itertuples():
+            partials.years[year] = values
+        partials.add_cities(data, position)
+        return partials
+
+    def add_cities(self, data, position=()):
+        """Добавляет накопители по городам: количество вакансий и сумму зарплат в рублях.
+
+        :param data: DataFrame с колонками salary_from, salary_to, salary_currency, area_name
+        :param position: начало позиции строк (название файла, начало части)
+        """
+        complete = (data.notna().all(axis=1) & data['salary_currency'].isin(currency_to_rub.keys())).to_numpy()
+        rows = np.flatnonzero(complete)
+        rates = data['salary_currency'].to_numpy(dtype=object)[rows]
+        rates = np.array([currency_to_rub[currency] for currency in rates], dtype=np.float64)
+        salaries = ((data['salary_from'].to_numpy()[rows] * rates + data['salary_to'].to_numpy()[rows] * rates) / 2
+                    ).astype(np.int64)
+        codes, areas = pd.factorize(data['area_name'].to_numpy(dtype=object)[rows])
+        counts = np.bincount(codes, minlength=len(areas))
+        sums = np.zeros(len(areas), dtype=np.int64)
+        np.add.at(sums, codes, salaries)
+        first = rows[np.unique(codes, return_index=True)[1]]
+        for area, count, salary_sum, row in zip(areas, counts.tolist(), sums.tolist(), first.tolist()):
+            self.add_city(DataSet.string_filter(area), count, salary_sum, position + (row,))
+
+    def add_city(self, area, count, salary_sum, first):
+        """Добавляет накопители одного города.
+
+        :param area: название города
+        :param count: количество вакансий
+        :param salary_sum: сумма зарплат
+        :param first: позиция первой строки
+        """
+        accumulator = self.cities.setdefault(area, [0, 0, first])
+        accumulator[0] += count
+        accumulator[1] += salary_sum
+        accumulator[2] = min(accumulator[2], first)
+
+    @staticmethod
+    def from_shard(shard, profession):
+        """Заполняет накопители по одной части файла.
+
+        :param shard: часть (название файла, начало, конец)
+        :param profession: название профессии
+        :return: объект класса YearPartials
+        """
+        return YearPartials.from_frame(Shards.read_shard(shard), profession, shard[:2])
+
+    def to_array(self):
+        """Упаковывает накопители в массив для передачи через разделяемую память (SharedArray).
+
+        :return: np.ndarray: строки - года, первый столбец - год, остальные - накопители (float64)
+        """
+        return np.array([[int(year)] + values for year, values in self.years.items()], dtype=np.float64).reshape(-1, 7)
+
+    def get_city_array(self):
+        """Упаковывает накопители по городам в массив для передачи через разделяемую память (SharedArray).
+        Названия городов передаются отдельно, в порядке self.cities.
+
+        :return: np.ndarray: строки - города, столбцы - количество вакансий, сумма зарплат, номер первой строки (int64)
+        """
+        return np.array([[count, salary_sum, first[-1]] for count, salary_sum, first in self.cities.values()],
+                        dtype=np.int64).reshape(-1, 3)
+
+    @staticmethod
+    def from_array(array, profession, areas=(), city_array=None, position=()):
+        """Восстанавливает накопители из массивов to_array и get_city_array.
+
+        :param array: массив NumPy с накопителями по годам
+        :param profession: название профессии
+        :param areas: названия городов
+        :param city_array: массив NumPy с накопителями по городам
+        :param position: начало позиции строк части (название файла, начало части)
+        :return: объект класса YearPartials
+        """
+        partials = YearPartials(profession)
+        for row in array.tolist():
+            partials.years[str(int(row[0]))] = [int(row[1]), row[2], int(row[3]), int(row[4]), row[5], int(row[6])]
+        if city_array is not None:
+            for area, (count, salary_sum, row) in zip(areas, city_array.tolist()):
+                partials.add_city(area, count, salary_sum, position + (row,))
+        return partials
+
+    def merge(self, other):
+        """Добавляет накопители другой части.
+
+        :param other: объект класса YearPartials
+        :return: этот же объект
+        """
+        for year, values in other.years.items():
+            accumulator = self.years.setdefault(year, [0] * len(values))
+            for i, value in enumerate(values):
+                accumulator[i] += value
+        for area, (count, salary_sum, first) in other.cities.items():
+            self.add_city(area, count, salary_sum, first)
+        return self
+
+    def get_rows(self):
+        """Вычисляет итоговые значения по годам в формате DataSet.get_data_file.
+
+        :return: list: кортежи (год, средняя зп, количество вакансий, средняя зп профессии, количество вакансий профессии)
+            по возрастанию года, средняя зп без зарплат - 0
+        """
+        return [(year, round(salary_sum / salary_count) if salary_count else 0, count,
+                 round(profession_sum / profession_salary_count) if profession_salary_count else 0, profession_count)
+                for year, (count, salary_sum, salary_count, profession_count, profession_sum, profession_salary_count)
+                in sorted(self.years.items())]
+
+    def get_statistics(self):
+        """Собирает объект VacancyStatistics с накопителями по городам в порядке первого появления,
+        чтобы доли, фильтр городов с долей от 1% и первые 10 значений считались так же, как в main.py.
+
+        :return: объект класса VacancyStatistics (накопители по годам не заполняются)
+        """
+        statistics = VacancyStatistics(self.profession)
+        for area, (count, salary_sum, first) in sorted(self.cities.items(), key=lambda item: item[1][2]):
+            statistics.count_vacancies += count
+            statistics.count_by_cities[area] = count
+            statistics.salary_by_cities[area] = salary_sum
+        return statistics
+
+    def get_cities(self):
+        """Вычисляет итоговые значения по городам в формате VacancyStatistics.get_report.
+
+        :return: tuple: средняя зарплата по городам и доля вакансий по городам (первые 10 значений)
+        """
+        return self.get_statistics().get_report()[4:]